@@ -0,0 +1,48 @@
+# _common.py
+#
+# Report helpers shared by the benchmark scripts: the machine info recorded
+# with every run and the --compare printout.
+
+import os
+import time
+import platform
+import subprocess
+import numpy as np
+import cv2
+
+# Metrics printed by compare(), besides every *_ms key
+RATE_KEYS = ("fps", "elapsed_s", "images_per_s")
+
+def machine_info(**extra):
+    """
+    Returns the git commit, time and machine a run was made on, plus any
+    script-specific entries in extra (e.g. the detector backend).
+    """
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **extra,
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+def compare(baseline, current, prefix=""):
+    """
+    Prints the change of every *_ms / fps / elapsed / images_per_s metric
+    present in both runs.
+    """
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            compare(baseline[key], value, name + ".")
+        elif isinstance(value, (int, float)) and (key.endswith("_ms") or key in RATE_KEYS) and baseline[key]:
+            print(f"{name:70s} {baseline[key]:10.3f} -> {value:10.3f} ({value / baseline[key]:.2f}x)")
@@ -0,0 +1,158 @@
+# bench_compositing.py
+#
+# Images-per-second benchmark for synthetic table composition. Run from the
+# repository root:
+#
+#   python benchmarks/bench_compositing.py [--output bench.json] [--compare old.json]
+#
+# "legacy" is the per-channel float64 blend the dataset scripts used before
+# data_scripts/compositor.py, "compositor" is the fixed-point engine on the
+# same table, cards and placements, and "generator" is the full
+# SyntheticTableGenerator.sample() path, with the sprite cache and rotating
+# every card ("generator_no_sprites"). Both are skipped without the card atlas.
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_scripts"))
+
+from compositor import Compositor
+from _common import machine_info, compare
+
+TABLE_SIZE = (1920, 1080)
+CARD_SIZE = (100, 140)
+
+def make_scene(card_count, cards_per_image, seed=0):
+    """
+    Returns a textured table and a list of (card, angle, x, y) pastes with
+    opaque cards and transparent rounded corners, like the real card images.
+    """
+    rng = np.random.default_rng(seed)
+    table = rng.integers(0, 256, (TABLE_SIZE[1], TABLE_SIZE[0], 3), dtype=np.uint8)
+    table = cv2.GaussianBlur(table, (0, 0), 3)
+
+    cards = []
+    w, h = CARD_SIZE
+    for _ in range(card_count):
+        card = rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.rectangle(mask, (4, 4), (w - 5, h - 5), 255, -1)
+        cv2.rectangle(mask, (0, 0), (w - 1, h - 1), 255, 4, lineType=cv2.LINE_AA)
+        card[:, :, 3] = cv2.GaussianBlur(mask, (5, 5), 0)
+        cards.append(card)
+
+    pastes = []
+    for _ in range(cards_per_image):
+        card = cards[rng.integers(len(cards))]
+        angle = int(rng.choice(np.arange(-30, 31, 5)))
+        x = int(rng.integers(0, TABLE_SIZE[0] - 2 * w))
+        y = int(rng.integers(0, TABLE_SIZE[1] - 2 * h))
+        pastes.append((card, angle, x, y))
+    return table, pastes
+
+def compose_legacy(table, pastes):
+    image = table.copy()
+    for card, angle, x, y in pastes:
+        h, w = card.shape[:2]
+        center = (w // 2, h // 2)
+        rot_mat = cv2.getRotationMatrix2D(center, angle, 1.0)
+        cos = abs(rot_mat[0, 0])
+        sin = abs(rot_mat[0, 1])
+        bound_w = int((h * sin) + (w * cos))
+        bound_h = int((h * cos) + (w * sin))
+        rot_mat[0, 2] += (bound_w / 2) - center[0]
+        rot_mat[1, 2] += (bound_h / 2) - center[1]
+        rotated = cv2.warpAffine(card, rot_mat, (bound_w, bound_h), flags=cv2.INTER_LINEAR,
+                                 borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0))
+        roi = image[y:y + bound_h, x:x + bound_w]
+        alpha = rotated[:, :, 3] / 255.0
+        for c in range(3):
+            roi[:, :, c] = (1 - alpha) * roi[:, :, c] + alpha * rotated[:, :, c]
+    return image
+
+def compose_engine(compositor, table, pastes):
+    image = table.copy()
+    for card, angle, x, y in pastes:
+        compositor.paste(image, compositor.rotate(card, angle), x, y)
+    return image
+
+def images_per_second(fn, images, warmup=3):
+    for _ in range(warmup):
+        fn(0)
+    samples = []
+    for i in range(images):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    samples = np.asarray(samples)
+    return {
+        "images": images,
+        "images_per_s": float(images / samples.sum()),
+        "mean_ms": float(samples.mean() * 1000.0),
+        "p95_ms": float(np.percentile(samples, 95) * 1000.0),
+    }
+
+def bench_compose(images, cards_per_image):
+    table, pastes = make_scene(50, cards_per_image)
+    compositor = Compositor()
+
+    legacy = compose_legacy(table, pastes)
+    engine = compose_engine(compositor, table, pastes)
+    max_difference = int(np.abs(legacy.astype(np.int16) - engine).max())
+
+    results = {
+        "table_size": list(TABLE_SIZE),
+        "cards_per_image": cards_per_image,
+        "max_pixel_difference": max_difference,
+        "legacy": images_per_second(lambda i: compose_legacy(table, pastes), images),
+        "compositor": images_per_second(lambda i: compose_engine(compositor, table, pastes), images),
+    }
+    results["speedup"] = results["compositor"]["images_per_s"] / results["legacy"]["images_per_s"]
+    return results
+
+def bench_generator(images, cards_dir, use_sprites):
+    from synthetic_stream import SyntheticTableGenerator
+    generator = SyntheticTableGenerator(cards_dir=cards_dir, use_sprites=use_sprites)
+    try:
+        generator.sample(0)
+    except FileNotFoundError as e:
+        return {"skipped": str(e)}
+    return images_per_second(generator.sample, images)
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic table composition throughput")
+    parser.add_argument("--output", default="bench_compositing.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="print the change against an earlier run")
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--cards-per-image", type=int, default=15)
+    parser.add_argument("--cards-dir", default="cards")
+    args = parser.parse_args()
+
+    report = {"machine": machine_info(), "results": {}}
+    print("Running compose...")
+    report["results"]["compose"] = bench_compose(args.images, args.cards_per_image)
+    print("Running generator...")
+    report["results"]["generator"] = bench_generator(args.images, args.cards_dir, use_sprites=True)
+    report["results"]["generator_no_sprites"] = bench_generator(args.images, args.cards_dir, use_sprites=False)
+
+    for name, result in report["results"].items():
+        for variant, stats in ([(name, result)] if "images_per_s" in result else result.items()):
+            if isinstance(stats, dict) and "images_per_s" in stats:
+                print(f"{variant:22s} {stats['images_per_s']:8.1f} images/s")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        compare(baseline["results"], report["results"])
+
+if __name__ == "__main__":
+    main()
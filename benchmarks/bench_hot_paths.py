@@ -0,0 +1,213 @@
+# bench_hot_paths.py
+#
+# CPU micro-benchmarks for the detector and results I/O hot paths.
+# Run from the repository root:
+#
+#   python benchmarks/bench_hot_paths.py [--output bench.json] [--compare old.json]
+#
+# Every benchmark records its timings in one JSON document (with the git
+# commit and machine info) so runs can be compared across commits. Benchmarks
+# that cannot run, e.g. without model weights, are recorded as skipped; runs
+# that error out are recorded as failed (with no timings to compare) and make
+# the script exit with status 1.
+
+import os
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+
+import detector
+import results_store
+from _common import machine_info, compare
+
+SAMPLE_IMAGE = os.path.join("assets", "table_example.jpeg")
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1000.0
+    return {
+        "runs": len(samples),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+    }
+
+def time_calls(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def bench_detect_on_frame(imgsz_values, repeat):
+    frame = cv2.imread(SAMPLE_IMAGE)
+    if frame is None:
+        return {"skipped": f"cannot read {SAMPLE_IMAGE}"}
+    try:
+        detector.get_model()
+    except Exception as e:
+        return {"skipped": f"model not available: {e}"}
+
+    original_imgsz = detector.IMGSZ
+    results = {"frame_shape": list(frame.shape)}
+    try:
+        for imgsz in imgsz_values:
+            detector.IMGSZ = imgsz
+            results[f"imgsz_{imgsz}"] = time_calls(lambda: detector.detect_on_frame(frame), repeat)
+    finally:
+        detector.IMGSZ = original_imgsz
+    return results
+
+def make_synthetic_clip(path, frame_count, size=(1280, 720), fps=30):
+    """
+    Writes a clip of the sample table with a few card-sized patches drifting
+    across it, so decode, inference and encode all see realistic frame sizes.
+    """
+    background = cv2.imread(SAMPLE_IMAGE)
+    if background is None:
+        background = np.full((size[1], size[0], 3), 60, dtype=np.uint8)
+    background = cv2.resize(background, size)
+    rng = random.Random(0)
+    patches = [(rng.randrange(0, size[0] - 120), rng.randrange(0, size[1] - 170)) for _ in range(5)]
+
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for i in range(frame_count):
+        frame = background.copy()
+        for j, (x, y) in enumerate(patches):
+            x = (x + i * (j + 1)) % (size[0] - 120)
+            cv2.rectangle(frame, (x, y), (x + 100, y + 140), (255 - 40 * j, 200, 40 * j), -1)
+        out.write(frame)
+    out.release()
+
+def bench_video_pipeline(frame_count):
+    """
+    Runs VideoPipeline (what "Process Video" runs) on a synthetic clip. A run
+    that raises, cannot open the clip or does not store a result for every
+    frame is reported as failed, without timings.
+    """
+    try:
+        detector.get_model()
+    except Exception as e:
+        return {"skipped": f"model not available: {e}"}
+
+    from pipeline import VideoPipeline
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "clip.mp4")
+        make_synthetic_clip(clip, frame_count)
+        result_path = os.path.join(tmp, "results" + results_store.RESULTS_EXTENSION)
+        pipeline = VideoPipeline(clip, os.path.join(tmp, "output.mp4"), result_path, 30)
+        try:
+            start = time.perf_counter()
+            ok = pipeline.run()
+            elapsed = time.perf_counter() - start
+            if not ok:
+                return {"failed": f"cannot open {clip}"}
+            stored = len(results_store.DetectionResults(result_path))
+        except Exception as e:
+            return {"failed": f"{type(e).__name__}: {e}"}
+
+    if pipeline.stats["frames"] != frame_count or stored != frame_count:
+        return {"failed": f"processed {pipeline.stats['frames']} and stored {stored} of {frame_count} frames"}
+    return {"frames": frame_count, "elapsed_s": elapsed, "fps": frame_count / elapsed,
+            "pipeline_elapsed_s": pipeline.stats["elapsed"]}
+
+def bench_load_detection_results(repeat):
+    paths = sorted(glob.glob(os.path.join("results", "results_*.txt")))
+    if not paths:
+        return {"skipped": "no results/results_*.txt files"}
+
+    results = {}
+    for path in paths:
+        name = os.path.basename(path)
+        entry = {"text_parse": time_calls(lambda: detector.load_detection_results(path), repeat)}
+        with tempfile.TemporaryDirectory() as tmp:
+            store_path = results_store.convert_text_results(path, os.path.join(tmp, "r" + results_store.RESULTS_EXTENSION))
+            entry["store_open"] = time_calls(lambda: results_store.DetectionResults(store_path), repeat)
+            store = results_store.DetectionResults(store_path)
+            frames = list(range(len(store)))
+            random.Random(0).shuffle(frames)
+            entry["store_random_frame"] = time_calls(lambda: [store.get(i) for i in frames[:100]], repeat)
+            entry["store_random_frame"]["frames_per_run"] = min(100, len(frames))
+            del store
+        results[name] = entry
+    return results
+
+def write_label_files(directory, file_count, boxes_per_file=15, classes=258):
+    rng = random.Random(0)
+    for i in range(file_count):
+        with open(os.path.join(directory, f"label_{i}.txt"), "w") as f:
+            for _ in range(boxes_per_file):
+                f.write(f"{rng.randrange(classes)} {rng.random():.6f} {rng.random():.6f} "
+                        f"{rng.uniform(0.03, 0.1):.6f} {rng.uniform(0.1, 0.2):.6f}\n")
+
+def bench_load_yolo_detections(labels_dir, file_count, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        if labels_dir:
+            paths = sorted(glob.glob(os.path.join(labels_dir, "*.txt")))
+            source = labels_dir
+        else:
+            write_label_files(tmp, file_count)
+            paths = sorted(glob.glob(os.path.join(tmp, "*.txt")))
+            source = "synthetic"
+        if not paths:
+            return {"skipped": f"no label files in {labels_dir}"}
+
+        stats = time_calls(lambda: [detector.load_yolo_detections(p, 1920, 1080) for p in paths], repeat)
+    stats["files"] = len(paths)
+    stats["source"] = source
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU micro-benchmarks for detection and results I/O")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="print the change against an earlier run")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[320, 480, 640, 960])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--clip-frames", type=int, default=120)
+    parser.add_argument("--labels-dir", help="label files for load_yolo_detections (default: synthetic)")
+    parser.add_argument("--label-files", type=int, default=500)
+    parser.add_argument("--only", nargs="+",
+                        choices=["detect_on_frame", "video_pipeline", "load_detection_results", "load_yolo_detections"])
+    args = parser.parse_args()
+
+    benchmarks = {
+        "detect_on_frame": lambda: bench_detect_on_frame(args.imgsz, args.repeat),
+        "video_pipeline": lambda: bench_video_pipeline(args.clip_frames),
+        "load_detection_results": lambda: bench_load_detection_results(args.repeat),
+        "load_yolo_detections": lambda: bench_load_yolo_detections(args.labels_dir, args.label_files, args.repeat),
+    }
+
+    report = {"machine": machine_info(backend=detector.BACKEND), "results": {}}
+    for name, run in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...")
+        report["results"][name] = run()
+        if "failed" in report["results"][name]:
+            print(f"FAILED {name}: {report['results'][name]['failed']}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        compare(baseline["results"], report["results"])
+
+    return 1 if any("failed" in result for result in report["results"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import cv2
 import numpy as np
 import os
-import uuid
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 
 def rotate_image(image, angle):
@@ -34,49 +36,126 @@ def scale_image(image, fx, fy):
 def adjust_brightness_contrast(image, alpha=1.0, beta=0):
     return cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
 
-def add_gaussian_noise(image):
+def add_gaussian_noise(image, rng=np.random):
     row, col, ch = image.shape
-    gauss = np.random.normal(0, 15, (row, col, ch)).reshape(row, col, ch)
+    gauss = rng.normal(0, 15, (row, col, ch)).reshape(row, col, ch)
     noisy = np.clip(image + gauss, 0, 255).astype(np.uint8)
     return noisy
 
-def augment_image(image):
-    augmentations = []
-
+# (name, function of (image, rng)). The name is part of every output file name,
+# so renaming or changing an augmentation means bumping its name.
+AUGMENTATIONS = [
     # Rotation
-    # for angle in [angle for angle in range(-90, 90, 15)]:
-    #     augmentations.append(rotate_image(image, angle))
-    
+    # *[(f"rot{angle}", lambda image, rng, angle=angle: rotate_image(image, angle)) for angle in range(-90, 90, 15)],
+
     # Flip
-    augmentations.append(cv2.flip(image, 1))  # horizontal
-    augmentations.append(cv2.flip(image, 0))  # vertical
+    ("flip_h", lambda image, rng: cv2.flip(image, 1)),
+    ("flip_v", lambda image, rng: cv2.flip(image, 0)),
 
     # Scaling
-    augmentations.append(scale_image(image, 1.2, 1.2))
-    augmentations.append(scale_image(image, 0.8, 0.8))
+    ("scale120", lambda image, rng: scale_image(image, 1.2, 1.2)),
+    ("scale80", lambda image, rng: scale_image(image, 0.8, 0.8)),
 
     # Brightness/contrast
-    augmentations.append(adjust_brightness_contrast(image, alpha=1.5, beta=20))
-    augmentations.append(adjust_brightness_contrast(image, alpha=0.7, beta=-20))
+    ("bright", lambda image, rng: adjust_brightness_contrast(image, alpha=1.5, beta=20)),
+    ("dark", lambda image, rng: adjust_brightness_contrast(image, alpha=0.7, beta=-20)),
 
     # Noise
-    augmentations.append(add_gaussian_noise(image))
+    ("noise", lambda image, rng: add_gaussian_noise(image, rng)),
 
     # Blur
-    augmentations.append(cv2.GaussianBlur(image, (5, 5), 0))
-
-    return augmentations
-
-def save_augmented_images(image_path, output_dir):
-    image = cv2.imread(image_path)
-    if image is None:
-        print(f"Failed to read {image_path}")
-        return
-
-    augmented_images = augment_image(image)
-    for aug_img in augmented_images:
-        aug_name = f"aug_{uuid.uuid4().hex[:8]}.jpg"
-        cv2.imwrite(os.path.join(output_dir, aug_name), aug_img)
+    ("blur", lambda image, rng: cv2.GaussianBlur(image, (5, 5), 0)),
+]
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DEFAULT_SEED = 0
+
+def augment_image(image, rng=np.random):
+    return [augment(image, rng) for _, augment in AUGMENTATIONS]
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+def augmented_name(source_hash, aug_name, seed):
+    """
+    Output names depend only on the source image content, the augmentation and
+    the seed, so a rerun finds the files it would produce and skips them.
+    """
+    return f"aug_{source_hash}_{aug_name}_s{seed}.jpg"
+
+def _augmentation_rng(source_hash, aug_name, seed):
+    key = hashlib.sha1(f"{source_hash}/{aug_name}/{seed}".encode()).digest()
+    return np.random.default_rng(int.from_bytes(key[:8], "little"))
+
+def _write_image(path, image):
+    # Through a temporary file, so an interrupted run never leaves a truncated
+    # image that the next run would take as done
+    ok, encoded = cv2.imencode(".jpg", image)
+    if not ok:
+        raise ValueError(f"Failed to encode {path}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encoded.tobytes())
+    os.replace(tmp_path, path)
+
+def augment_folder(folder, seed=DEFAULT_SEED):
+    """
+    Brings the augmentations of one card folder up to date: writes the missing
+    ones and removes those of images that changed or no longer exist.
+    Returns (written, skipped, removed).
+    """
+    filenames = os.listdir(folder)
+    sources = [f for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS) and not f.startswith("aug_")]
+    existing = {f for f in filenames if f.startswith("aug_")}
+
+    expected = set()
+    written = skipped = 0
+    for filename in sources:
+        image_path = os.path.join(folder, filename)
+        source_hash = file_hash(image_path)
+        names = [augmented_name(source_hash, aug_name, seed) for aug_name, _ in AUGMENTATIONS]
+        # All of them, before decoding: if the image cannot be read, its
+        # earlier augmentations are kept rather than removed as stale
+        expected.update(names)
+        image = None
+        for name, (aug_name, augment) in zip(names, AUGMENTATIONS):
+            if name in existing:
+                skipped += 1
+                continue
+            if image is None:
+                image = cv2.imread(image_path)
+                if image is None:
+                    print(f"Failed to read {image_path}")
+                    break
+            _write_image(os.path.join(folder, name), augment(image, _augmentation_rng(source_hash, aug_name, seed)))
+            written += 1
+
+    stale = existing - expected
+    for name in stale:
+        os.remove(os.path.join(folder, name))
+    return written, skipped, len(stale)
+
+def card_folders(root_dir='cards'):
+    folders = []
+    for foldername, _, filenames in os.walk(root_dir):
+        if any(f.lower().endswith(IMAGE_EXTENSIONS) for f in filenames):
+            folders.append(foldername)
+    return sorted(folders)
+
+def process_all_images(root_dir='cards', workers=None, seed=DEFAULT_SEED):
+    """
+    Augments every card folder under root_dir with a process pool, one task
+    per folder. Folders that are already up to date cost one hash per image.
+    """
+    folders = card_folders(root_dir)
+    totals = [0, 0, 0]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(augment_folder, folder, seed) for folder in folders]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Augmenting", unit="folder"):
+            for i, count in enumerate(future.result()):
+                totals[i] += count
+    return tuple(totals)
 
 def clear_augmented_images(foldername):
     for filename in os.listdir(foldername):
@@ -84,19 +163,6 @@ def clear_augmented_images(foldername):
             os.remove(os.path.join(foldername, filename))
             print(f"Removed {filename}")
 
-def process_all_images(root_dir='cards'):
-    for foldername, _, filenames in os.walk(root_dir):
-        print('iterating through folder:', foldername)
-        if not os.path.exists(foldername):
-            print(f"Folder {foldername} does not exist.")
-            continue
-        image_files = [f for f in filenames if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        if image_files:
-            print(f"\nProcessing folder: {foldername}")
-            for filename in tqdm(image_files, desc=f"Augmenting", unit="img"):
-                image_path = os.path.join(foldername, filename)
-                save_augmented_images(image_path, foldername)
-
 def clear_augmented_images_in_all_folders(root_dir='cards'):
     for foldername, _, filenames in os.walk(root_dir):
         print('iterating through folder:', foldername)
@@ -106,7 +172,18 @@ def clear_augmented_images_in_all_folders(root_dir='cards'):
         clear_augmented_images(foldername)
         print(f"Cleared augmented images in {foldername}")
 
-print("Starting augmentation...")
-clear_augmented_images_in_all_folders('cards')
-process_all_images('cards')
-print("\n✅ Augmentation complete.")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Augment the card images, skipping work done by earlier runs")
+    parser.add_argument("root_dir", nargs="?", default="cards")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help="seed of the random augmentations; part of the output names")
+    parser.add_argument("--clean", action="store_true", help="delete every aug_* file first and regenerate all")
+    args = parser.parse_args()
+
+    print("Starting augmentation...")
+    if args.clean:
+        clear_augmented_images_in_all_folders(args.root_dir)
+    written, skipped, removed = process_all_images(args.root_dir, args.workers, args.seed)
+    print(f"\n✅ Augmentation complete: {written} written, {skipped} already up to date, {removed} stale removed.")
+    print("Rebuild the card atlas with `python executable/card_atlas.py` to include them.")
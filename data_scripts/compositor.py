@@ -0,0 +1,116 @@
+# compositor.py
+#
+# Alpha compositing of BGRA card images onto BGR table images for the
+# synthetic dataset scripts.
+#
+# The blend is done in uint16 fixed point on all three channels at once:
+#
+#   out = (card * a + table * (255 - a)) / 255
+#
+# with the division by 255 done exactly as ((v + 128) + ((v + 128) >> 8)) >> 8,
+# which matches round(v / 255) for every v a uint8 blend can produce. All
+# intermediate arrays live in scratch buffers owned by the Compositor and
+# reused across pastes, so a paste allocates nothing once the buffers have
+# grown to the largest card seen.
+
+import math
+import cv2
+import numpy as np
+
+class Compositor:
+    """
+    Pastes (optionally rotated) BGRA cards onto BGR images.
+
+    One instance is meant to be reused for every paste of a process; it is
+    not thread safe because the scratch buffers are shared. Arrays returned
+    by rotate() are views into those buffers and only valid until the next
+    rotate() call.
+    """
+
+    def __init__(self):
+        self._rotated = np.empty(0, dtype=np.uint8)
+        self._alpha = np.empty(0, dtype=np.uint8)
+        self._alpha3 = np.empty(0, dtype=np.uint8)
+        self._color = np.empty(0, dtype=np.uint8)
+        self._blend = np.empty(0, dtype=np.uint16)
+        self._background = np.empty(0, dtype=np.uint16)
+
+    @staticmethod
+    def _scratch(buffer, shape):
+        size = math.prod(shape)
+        if buffer.size < size:
+            buffer = np.empty(max(size, buffer.size * 2), dtype=buffer.dtype)
+        return buffer, buffer[:size].reshape(shape)
+
+    def rotate(self, card, angle):
+        """
+        Rotates a BGRA card by angle degrees around its center into a buffer
+        just large enough to hold it, with transparent corners.
+        """
+        if angle == 0:
+            return card
+        h, w = card.shape[:2]
+        center = (w // 2, h // 2)
+        rot_mat = cv2.getRotationMatrix2D(center, angle, 1.0)
+        cos = abs(rot_mat[0, 0])
+        sin = abs(rot_mat[0, 1])
+        bound_w = int((h * sin) + (w * cos))
+        bound_h = int((h * cos) + (w * sin))
+        rot_mat[0, 2] += (bound_w / 2) - center[0]
+        rot_mat[1, 2] += (bound_h / 2) - center[1]
+
+        self._rotated, rotated = self._scratch(self._rotated, (bound_h, bound_w, 4))
+        cv2.warpAffine(card, rot_mat, (bound_w, bound_h), dst=rotated, flags=cv2.INTER_LINEAR,
+                       borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0))
+        return rotated
+
+    def paste(self, image, card, x, y):
+        """
+        Blends a BGRA card onto image (BGR, modified in place) with its top
+        left corner at (x, y). Cards that stick out of the image are clipped.
+
+        Returns the visible (x1, y1, x2, y2) box, or None if the card lies
+        entirely outside the image.
+        """
+        image_h, image_w = image.shape[:2]
+        card_h, card_w = card.shape[:2]
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + card_w, image_w), min(y + card_h, image_h)
+        if x1 >= x2 or y1 >= y2:
+            return None
+
+        card = card[y1 - y:y2 - y, x1 - x:x2 - x]
+        roi = image[y1:y2, x1:x2]
+        h, w = y2 - y1, x2 - x1
+
+        # Alpha is spread over three channels first: numpy broadcasting a
+        # (h, w, 1) array against (h, w, 3) runs a 3-element inner loop and
+        # is several times slower than the equal-shape ufuncs below
+        self._alpha, alpha = self._scratch(self._alpha, (h, w))
+        self._alpha3, alpha3 = self._scratch(self._alpha3, (h, w, 3))
+        self._color, color = self._scratch(self._color, (h, w, 3))
+        self._blend, blend = self._scratch(self._blend, (h, w, 3))
+        self._background, background = self._scratch(self._background, (h, w, 3))
+
+        cv2.extractChannel(card, 3, dst=alpha)
+        cv2.cvtColor(alpha, cv2.COLOR_GRAY2BGR, dst=alpha3)
+        cv2.cvtColor(card, cv2.COLOR_BGRA2BGR, dst=color)
+        np.multiply(color, alpha3, out=blend, dtype=np.uint16)
+        np.subtract(255, alpha3, out=alpha3)
+        np.multiply(roi, alpha3, out=background, dtype=np.uint16)
+        blend += background
+        blend += 128
+        np.right_shift(blend, 8, out=background)
+        blend += background
+        blend >>= 8
+        np.copyto(roi, blend, casting='unsafe')
+        return x1, y1, x2, y2
+
+    def paste_centered(self, image, card, center, angle=0):
+        """
+        Rotates a card and pastes it centered on center = (x, y). Returns the
+        visible box as paste() does.
+        """
+        rotated = self.rotate(card, angle)
+        h, w = rotated.shape[:2]
+        return self.paste(image, rotated, int(center[0]) - w // 2, int(center[1]) - h // 2)
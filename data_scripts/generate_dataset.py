@@ -0,0 +1,181 @@
+import os
+import time
+import json
+import math
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from synthetic_stream import SyntheticTableGenerator, to_yolo
+
+# Layout of the output directory, readable by ultralytics as is:
+#   images/{train,val}/shard_NNNNN/IIIIIIII.jpg
+#   labels/{train,val}/shard_NNNNN/IIIIIIII.txt
+#   manifest.json   settings of the run and the shards finished so far
+#   dataset.yaml    path, train, val and class names
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_SHARD_SIZE = 250
+DEFAULT_VAL_FRACTION = 0.2
+# Threads per worker encoding and writing images while the next ones are composed
+WRITER_THREADS = 2
+
+def shard_name(shard):
+    return f"shard_{shard:05d}"
+
+def sample_split(seed, index, val_fraction):
+    """
+    Train/val assignment of one image, fixed by (seed, index) like its content.
+    """
+    return "val" if np.random.default_rng([seed, index, 1]).random() < val_fraction else "train"
+
+def generator_settings(generator):
+    return {
+        "card_size": list(generator.card_size),
+        "num_cards": list(generator.num_cards),
+        "angles": list(generator.angles),
+        "min_distance": generator.min_distance,
+        "use_sprites": generator.use_sprites,
+        "tables": [[name, list(area)] for name, area in generator.tables],
+    }
+
+def load_manifest(output_dir, settings):
+    """
+    Returns the manifest of an earlier run into output_dir, or a new one.
+    Raises ValueError if that run used different settings, since its shards
+    would not match the ones this run generates.
+    """
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "settings": settings, "shards": {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("settings") != settings:
+        raise ValueError(f"{path} was written with different settings; use another output directory or --restart")
+    return manifest
+
+def write_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def write_dataset_yaml(output_dir, num_classes):
+    # Same format as custom.yaml; class N-1 is the cards/sv1-N folder
+    lines = ["names:"] + [f"- sv1-{i + 1}" for i in range(num_classes)]
+    lines += [f"path: {os.path.abspath(output_dir)}", "train: images/train", "val: images/val"]
+    with open(os.path.join(output_dir, "dataset.yaml"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def _write_sample(image_path, label_path, image, labels):
+    cv2.imwrite(image_path, image)
+    classes, boxes = to_yolo(labels, image.shape)
+    with open(label_path, "w") as f:
+        for cls_id, (x, y, w, h) in zip(classes[:, 0], boxes):
+            f.write(f"{int(cls_id)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n")
+
+_generator = None
+
+def _init_worker(generator):
+    global _generator
+    # Parallelism comes from the processes; one OpenCV thread each
+    cv2.setNumThreads(1)
+    _generator = generator
+
+def _generate_shard(output_dir, shard, start, stop, val_fraction, image_format):
+    started = time.perf_counter()
+    for kind in ("images", "labels"):
+        for split in ("train", "val"):
+            os.makedirs(os.path.join(output_dir, kind, split, shard_name(shard)), exist_ok=True)
+
+    boxes = val = 0
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=WRITER_THREADS) as writer:
+        for index in range(start, stop):
+            image, labels = _generator.sample(index)
+            split = sample_split(_generator.seed, index, val_fraction)
+            name = f"{index:08d}"
+            image_path = os.path.join(output_dir, "images", split, shard_name(shard), f"{name}.{image_format}")
+            label_path = os.path.join(output_dir, "labels", split, shard_name(shard), f"{name}.txt")
+            pending.append(writer.submit(_write_sample, image_path, label_path, image, labels))
+            # Bound the images waiting in memory if the disk is slower than composition
+            while len(pending) > 2 * WRITER_THREADS:
+                pending.popleft().result()
+            boxes += len(labels)
+            val += split == "val"
+        for future in pending:
+            future.result()
+
+    return shard, {"start": start, "count": stop - start, "val": val, "boxes": boxes,
+                   "seconds": round(time.perf_counter() - started, 3)}
+
+def generate(output_dir, count, generator, shard_size=DEFAULT_SHARD_SIZE, workers=None,
+             val_fraction=DEFAULT_VAL_FRACTION, image_format="jpg"):
+    """
+    Writes images 0..count-1 of generator to output_dir in shards of
+    shard_size images, skipping the shards an earlier run already finished.
+    Returns (images generated by this run, seconds).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    settings = {"seed": generator.seed, "shard_size": shard_size, "val_fraction": val_fraction,
+                "image_format": image_format, "generator": generator_settings(generator)}
+    manifest = load_manifest(output_dir, settings)
+
+    todo = []
+    done = 0
+    for shard in range(math.ceil(count / shard_size)):
+        start, stop = shard * shard_size, min((shard + 1) * shard_size, count)
+        # A shard is only recorded once all its files are written, and a
+        # larger --count can extend a previously final, shorter shard
+        if manifest["shards"].get(shard_name(shard), {}).get("count") == stop - start:
+            done += stop - start
+        else:
+            todo.append((shard, start, stop))
+
+    # Build the sprite cache here once instead of in every worker
+    generator.sprite_cache
+    generated = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(generator,)) as pool:
+        futures = [pool.submit(_generate_shard, output_dir, shard, start, stop, val_fraction, image_format)
+                   for shard, start, stop in todo]
+        with tqdm(total=count, initial=done, desc="Generating", unit="img") as progress:
+            for future in as_completed(futures):
+                shard, record = future.result()
+                manifest["shards"][shard_name(shard)] = record
+                write_manifest(output_dir, manifest)
+                generated += record["count"]
+                progress.update(record["count"])
+                progress.set_postfix(img_s=f"{generated / (time.perf_counter() - started):.1f}")
+
+    write_dataset_yaml(output_dir, generator.num_classes)
+    return generated, time.perf_counter() - started
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic table dataset in resumable shards")
+    parser.add_argument("output_dir")
+    parser.add_argument("--count", type=int, required=True, help="total number of images")
+    parser.add_argument("--seed", type=int, default=0, help="image i is the same for the same seed and i")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--val-fraction", type=float, default=DEFAULT_VAL_FRACTION)
+    parser.add_argument("--format", choices=["jpg", "png"], default="jpg")
+    parser.add_argument("--cards", default="cards", help="directory holding card_atlas.bin")
+    parser.add_argument("--no-sprites", action="store_true", help="rotate cards per paste instead of using the sprite cache")
+    parser.add_argument("--restart", action="store_true", help="forget the shards of an earlier run")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(os.path.join(args.output_dir, MANIFEST_NAME)):
+        os.remove(os.path.join(args.output_dir, MANIFEST_NAME))
+
+    generator = SyntheticTableGenerator(cards_dir=args.cards, seed=args.seed, use_sprites=not args.no_sprites)
+    generated, seconds = generate(args.output_dir, args.count, generator, args.shard_size, args.workers,
+                                  args.val_fraction, args.format)
+    print(f"\n✅ Generated {generated} images in {seconds:.1f}s "
+          f"({generated / seconds if seconds else 0:.1f} images/s), {args.count - generated} already done.")
+    print(f"Train with data={os.path.join(args.output_dir, 'dataset.yaml')}")
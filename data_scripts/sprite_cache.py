@@ -0,0 +1,145 @@
+import os
+import sys
+import argparse
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+from card_atlas import load_atlas, ATLAS_PATH, parse_size
+from results_store import read_next_array
+from compositor import Compositor
+
+# Every card of the atlas pre-rendered at one size and a fixed set of angles,
+# so composing a table only blends. Written next to the atlas as
+# card_sprites_WxH.bin, a concatenation of .npy arrays like the atlas:
+#   header   int64[3]               (FORMAT_VERSION, number of cards, number of angles)
+#   angles   int32[a]
+#   boxes    int32[n, a, 4]         tight (x1, y1, x2, y2) of the opaque pixels in each sprite
+#   sprites  uint8[n, h_a, w_a, 4]  BGRA, one array per angle (the size depends on the angle)
+FORMAT_VERSION = 1
+DEFAULT_ANGLES = tuple(range(-30, 31, 5))
+
+def sprite_cache_path(size, atlas_path=ATLAS_PATH):
+    return os.path.join(os.path.dirname(atlas_path), f"card_sprites_{size[0]}x{size[1]}.bin")
+
+def _render_angle(images, size, angle, compositor):
+    """
+    Returns (sprites, boxes) of every card rotated by angle.
+    """
+    sprites = None
+    boxes = np.zeros((len(images), 4), dtype=np.int32)
+    for row, image in enumerate(images):
+        if image.shape[1::-1] != tuple(size):
+            image = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+        rotated = compositor.rotate(image, angle)
+        if sprites is None:
+            sprites = np.empty((len(images),) + rotated.shape, dtype=np.uint8)
+        sprites[row] = rotated
+        x, y, w, h = cv2.boundingRect(rotated[:, :, 3])
+        boxes[row] = (x, y, x + w, y + h)
+    return sprites, boxes
+
+class SpriteCache:
+    """
+    Rotated card sprites by (atlas row, angle), either rendered in memory or
+    memory-mapped from a file written by build_sprite_cache.
+    """
+
+    def __init__(self, angles, boxes, sprites, path=None):
+        self.path = path
+        self.angles = [int(angle) for angle in angles]
+        self.boxes = boxes
+        self._sprites = sprites
+        self._angle_index = {angle: i for i, angle in enumerate(self.angles)}
+
+    @classmethod
+    def render(cls, atlas, size, angles=DEFAULT_ANGLES):
+        images = atlas.images(size if tuple(size) in atlas.sizes else None)
+        compositor = Compositor()
+        rendered = [_render_angle(images, size, angle, compositor) for angle in angles]
+        boxes = np.stack([boxes for _, boxes in rendered], axis=1)
+        return cls(angles, boxes, [sprites for sprites, _ in rendered])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as fh:
+            header = read_next_array(fh, path)
+            if int(header[0]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported sprite cache version {int(header[0])} in {path}")
+            angles = read_next_array(fh, path)
+            boxes = read_next_array(fh, path)
+            sprites = [read_next_array(fh, path) for _ in range(int(header[2]))]
+        return cls(angles, boxes, sprites, path)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, angle):
+        return angle in self._angle_index
+
+    def sprite(self, row, angle):
+        """
+        Returns (full sprite, tight box) of card row at angle. The full sprite
+        has the size of the card's rotated bounding rectangle; the box is
+        where its opaque pixels are.
+        """
+        i = self._angle_index[angle]
+        return self._sprites[i][row], tuple(int(v) for v in self.boxes[row, i])
+
+def build_sprite_cache(atlas, size, path, angles=DEFAULT_ANGLES):
+    """
+    Renders every atlas card at size and each angle into path, one angle at
+    a time so only one angle's sprites are held in memory.
+    """
+    compositor = Compositor()
+    images = atlas.images(size if tuple(size) in atlas.sizes else None)
+    boxes = np.zeros((len(images), len(angles), 4), dtype=np.int32)
+
+    # Several DataLoader workers may build it at once; each writes its own file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.lib.format.write_array(fh, np.array([FORMAT_VERSION, len(images), len(angles)], dtype=np.int64))
+        np.lib.format.write_array(fh, np.array(angles, dtype=np.int32))
+        boxes_offset = fh.tell()
+        np.lib.format.write_array(fh, boxes)
+        for i, angle in enumerate(angles):
+            sprites, boxes[:, i] = _render_angle(images, size, angle, compositor)
+            np.lib.format.write_array(fh, sprites)
+        fh.seek(boxes_offset)
+        np.lib.format.write_array(fh, boxes)
+    os.replace(tmp_path, path)
+
+def load_sprite_cache(atlas_path=ATLAS_PATH, size=(100, 140), angles=DEFAULT_ANGLES, in_memory=False):
+    """
+    Returns the sprite cache of the atlas at atlas_path, building its file
+    first if it is missing, older than the atlas or made for other angles.
+    With in_memory the sprites are rendered into this process's memory
+    instead. Returns None if the atlas has not been built.
+    """
+    atlas = load_atlas(atlas_path)
+    if atlas is None:
+        return None
+    if in_memory:
+        return SpriteCache.render(atlas, size, angles)
+
+    path = sprite_cache_path(size, atlas_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(atlas_path):
+        cache = SpriteCache.load(path)
+        if cache.angles == [int(angle) for angle in angles] and len(cache) == len(atlas):
+            return cache
+    build_sprite_cache(atlas, size, path, angles)
+    return SpriteCache.load(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render rotated card sprites from the card atlas")
+    parser.add_argument("--atlas", default=ATLAS_PATH)
+    parser.add_argument("--size", type=parse_size, default=(100, 140), help="card size WxH")
+    parser.add_argument("--angles", type=int, nargs="+", default=list(DEFAULT_ANGLES))
+    args = parser.parse_args()
+
+    atlas = load_atlas(args.atlas)
+    if atlas is None:
+        sys.exit(f"{args.atlas} not found; build it with executable/card_atlas.py")
+    path = sprite_cache_path(args.size, args.atlas)
+    build_sprite_cache(atlas, args.size, path, args.angles)
+    print(f"Wrote {len(atlas)} cards x {len(args.angles)} angles to {path} ({os.path.getsize(path) / 2**20:.0f} MiB)")
@@ -1,16 +1,29 @@
 import os
+import sys
 import cv2
+import functools
 import random
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+from card_atlas import load_atlas, ATLAS_PATH
+from compositor import Compositor
+
+# Shared by every draw_cards_in_table call so its scratch buffers are reused
+_compositor = Compositor()
+
 def load_card_dataset(dataset_path = 'cards/'):
     """
     Load the card dataset from the specified path.
     Args:
         dataset_path (str): Path to the dataset folder.
     Returns:
-        list: List of image file paths.
+        list: Card images (memory-mapped BGRA views) if the card atlas has been
+        built with executable/card_atlas.py, otherwise image file paths.
     """
+    atlas = load_atlas(os.path.join(dataset_path, os.path.basename(ATLAS_PATH)))
+    if atlas is not None:
+        return list(atlas.images())
     image_files = []
     for root, _, files in os.walk(dataset_path):
         for file in files:
@@ -36,13 +49,15 @@ def load_table_dataset_labels(dataset_path = 'predict/'):
                     labels += load_labels(label_file)
     return labels
 
+@functools.lru_cache(maxsize=256)
 def load_image(image_path):
     """
     Load an image from the specified path.
     Args:
         image_path (str): Path to the image file.
     Returns:
-        numpy.ndarray: Loaded image.
+        numpy.ndarray: Loaded image. Images are cached, so callers must not
+        modify it in place.
     """
 
     image = cv2.imread(image_path)
@@ -125,8 +140,9 @@ def draw_cards_in_table(blank_table, labels, cards):
 
     for label in random_labels:
         x1, y1, x2, y2 = label
-        card_image_path = random.choice(cards)
-        card_image = load_image(card_image_path)
+        card = random.choice(cards)
+        # Atlas images are already decoded; drop their alpha as cv2.imread does here
+        card_image = load_image(card) if isinstance(card, str) else card[:, :, :3]
 
         card_h, card_w = card_image.shape[:2]
 
@@ -142,51 +158,10 @@ def draw_cards_in_table(blank_table, labels, cards):
         if resized_card.shape[2] == 3:
             resized_card = cv2.cvtColor(resized_card, cv2.COLOR_BGR2BGRA)
 
-        # Rotation
+        # Rotate and center the card in the label box; cards that stick out
+        # of the table are clipped instead of skipped
         angle = random.choice(range(-90, 91, 15))
-        center = (new_w // 2, new_h // 2)
-        rot_mat = cv2.getRotationMatrix2D(center, angle, 1.0)
-
-        # Compute bounding box for rotated image
-        cos = abs(rot_mat[0, 0])
-        sin = abs(rot_mat[0, 1])
-        bound_w = int((new_h * sin) + (new_w * cos))
-        bound_h = int((new_h * cos) + (new_w * sin))
-
-        # Adjust transformation matrix
-        rot_mat[0, 2] += (bound_w / 2) - center[0]
-        rot_mat[1, 2] += (bound_h / 2) - center[1]
-
-        # Rotate with transparent background
-        rotated_card = cv2.warpAffine(
-            resized_card,
-            rot_mat,
-            (bound_w, bound_h),
-            flags=cv2.INTER_LINEAR,
-            borderMode=cv2.BORDER_CONSTANT,
-            borderValue=(0, 0, 0, 0)  # Transparent
-        )
-
-        # Compute top-left corner to center rotated image in label box
-        box_w = x2 - x1
-        box_h = y2 - y1
-        offset_x = x1 + (box_w - bound_w) // 2
-        offset_y = y1 + (box_h - bound_h) // 2
-
-        # Clip offsets to image bounds
-        if offset_x < 0 or offset_y < 0 or offset_x + bound_w > table.shape[1] or offset_y + bound_h > table.shape[0]:
-            continue  # Skip if rotated card does not fit
-
-        # Define region of interest on table
-        roi = table[offset_y:offset_y+bound_h, offset_x:offset_x+bound_w]
-
-        # Create masks from alpha channel
-        alpha = rotated_card[:, :, 3] / 255.0
-        for c in range(3):  # For BGR channels
-            roi[:, :, c] = (1 - alpha) * roi[:, :, c] + alpha * rotated_card[:, :, c]
-
-        # Update table with blended ROI
-        table[offset_y:offset_y+bound_h, offset_x:offset_x+bound_w] = roi
+        _compositor.paste_centered(table, resized_card, ((x1 + x2) // 2, (y1 + y2) // 2), angle)
 
     return table, random_labels
 
@@ -1,9 +1,27 @@
 import os
+import sys
 import cv2
+import functools
 import random
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+from card_atlas import load_atlas, ATLAS_PATH
+from compositor import Compositor
+from sprite_cache import load_sprite_cache
+
+CARD_SIZE = (100, 140)
+ANGLES = range(-30, 31, 5)
+
+# Shared by every draw_random_cards call so its scratch buffers are reused
+_compositor = Compositor()
+
 def load_card_dataset(dataset_path='cards/'):
+    # Decoded cards from the atlas (built with executable/card_atlas.py) if there is one
+    atlas = load_atlas(os.path.join(dataset_path, os.path.basename(ATLAS_PATH)))
+    if atlas is not None:
+        size = CARD_SIZE if CARD_SIZE in atlas.sizes else None
+        return list(atlas.images(size))
     image_files = []
     for root, _, files in os.walk(dataset_path):
         for file in files:
@@ -11,6 +29,7 @@ def load_card_dataset(dataset_path='cards/'):
                 image_files.append(os.path.join(root, file))
     return image_files
 
+@functools.lru_cache(maxsize=256)
 def load_image(image_path):
     image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
     if image is None:
@@ -27,41 +46,37 @@ def save_yolo_labels(labels, image_shape, output_path, class_id=0):
             box_height = (y2 - y1) / h
             f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {box_width:.6f} {box_height:.6f}\n")
 
-def draw_random_cards(blank_table, cards, area, num_cards=random.randint(0,15)):
+def draw_random_cards(blank_table, cards, area, num_cards=random.randint(0,15), sprites=None):
+    # sprites: optional SpriteCache of the atlas rows in cards, at CARD_SIZE and ANGLES
     table = blank_table.copy()
     labels = []
 
     x_min, y_min, x_max, y_max = area
     for _ in range(num_cards):
-        card_path = random.choice(cards)
-        card = load_image(card_path)
-        if card is None:
-            continue
-
-        # Add alpha if missing
-        if card.shape[2] == 3:
-            card = cv2.cvtColor(card, cv2.COLOR_BGR2BGRA)
-
-        # Random size
-        target_w, target_h = 100, 140
-        card = cv2.resize(card, (target_w, target_h), interpolation=cv2.INTER_AREA)
-
-        # Random rotation
-        angle = random.choice(range(-30, 31, 5))
-        center = (target_w // 2, target_h // 2)
-        rot_mat = cv2.getRotationMatrix2D(center, angle, 1.0)
-
-        cos = abs(rot_mat[0, 0])
-        sin = abs(rot_mat[0, 1])
-        bound_w = int((target_h * sin) + (target_w * cos))
-        bound_h = int((target_h * cos) + (target_w * sin))
-
-        rot_mat[0, 2] += (bound_w / 2) - center[0]
-        rot_mat[1, 2] += (bound_h / 2) - center[1]
-
-        rotated_card = cv2.warpAffine(card, rot_mat, (bound_w, bound_h),
-                                      flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT,
-                                      borderValue=(0, 0, 0, 0))
+        row = random.randrange(len(cards))
+        angle = random.choice(ANGLES)
+        if sprites is not None:
+            # Pre-rotated card and the box of its opaque pixels
+            rotated_card, (box_x1, box_y1, box_x2, box_y2) = sprites.sprite(row, angle)
+        else:
+            card = cards[row]
+            if isinstance(card, str):
+                card = load_image(card)
+            if card is None:
+                continue
+
+            # Add alpha if missing
+            if card.shape[2] == 3:
+                card = cv2.cvtColor(card, cv2.COLOR_BGR2BGRA)
+
+            # Random size
+            if card.shape[1::-1] != CARD_SIZE:
+                card = cv2.resize(card, CARD_SIZE, interpolation=cv2.INTER_AREA)
+
+            # Random rotation
+            rotated_card = _compositor.rotate(card, angle)
+            box_x1, box_y1, box_x2, box_y2 = 0, 0, rotated_card.shape[1], rotated_card.shape[0]
+        bound_h, bound_w = rotated_card.shape[:2]
 
         # Random position inside the allowed area
         max_x = x_max - bound_w
@@ -71,23 +86,21 @@ def draw_random_cards(blank_table, cards, area, num_cards=random.randint(0,15)):
         offset_x = random.randint(x_min, max_x)
         offset_y = random.randint(y_min, max_y)
 
-        roi = table[offset_y:offset_y+bound_h, offset_x:offset_x+bound_w]
-
-        alpha = rotated_card[:, :, 3] / 255.0
-        for c in range(3):
-            roi[:, :, c] = (1 - alpha) * roi[:, :, c] + alpha * rotated_card[:, :, c]
-        table[offset_y:offset_y+bound_h, offset_x:offset_x+bound_w] = roi
-
-        # Save bounding box
-        labels.append((offset_x, offset_y, offset_x + bound_w, offset_y + bound_h))
+        # Save the visible bounding box
+        box = _compositor.paste(table, rotated_card[box_y1:box_y2, box_x1:box_x2],
+                                offset_x + box_x1, offset_y + box_y1)
+        if box is not None:
+            labels.append(box)
 
     return table, labels
 
 def main():
     cards = load_card_dataset()
+    # Pre-rotated cards, if cards come from the atlas
+    sprites = load_sprite_cache(size=CARD_SIZE, angles=ANGLES) if not isinstance(cards[0], str) else None
     blank_table = load_image('table.png')
     area = (100, 100, blank_table.shape[1] - 100, blank_table.shape[0] - 100)  # safe margin
-    table_with_cards, labels = draw_random_cards(blank_table, cards, area)
+    table_with_cards, labels = draw_random_cards(blank_table, cards, area, sprites=sprites)
 
     for x1, y1, x2, y2 in labels:
         cv2.rectangle(table_with_cards, (x1, y1), (x2, y2), (0, 255, 0), 2)
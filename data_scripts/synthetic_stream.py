@@ -0,0 +1,173 @@
+import os
+import sys
+import math
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+from card_atlas import load_atlas, ATLAS_PATH
+from compositor import Compositor
+from sprite_cache import load_sprite_cache
+
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "table_images")
+
+# Table backgrounds and the (x_min, y_min, x_max, y_max) area cards are placed
+# in; negative values count from the right/bottom edge (as in syntetic_dataset.ipynb)
+TABLES = [
+    ("table1.png", (400, 200, -100, -100)),
+    ("table2.png", (400, 200, -100, -100)),
+    ("table3.png", (500, 150, 1400, -100)),
+    ("table4.png", (500, 150, 1400, -100)),
+    ("table5.png", (400, 200, -100, -100)),
+    ("table6.png", (500, 150, 1400, -100)),
+    ("table7.png", (400, 200, -100, -100)),
+    ("white_image.png", (100, 100, -100, -100)),
+]
+
+CARD_SIZE = (100, 140)
+
+class SyntheticTableGenerator:
+    """
+    Composes synthetic table images with cards from the card atlas, in memory.
+
+    sample(index) always returns the same image and labels for the same
+    (seed, index), whichever process calls it, so a training sample can be
+    reproduced without having been written to disk; sample(index, epoch)
+    draws a different composition for every (seed, epoch, index). The atlas and the table
+    images are opened lazily, once per process (e.g. per DataLoader worker).
+    With use_sprites, cards are taken pre-rotated from the sprite cache
+    (built next to the atlas on first use) and labeled with their tight box.
+    """
+
+    def __init__(self, cards_dir="cards", tables=TABLES, tables_dir=TABLES_DIR, card_size=CARD_SIZE,
+                 num_cards=(3, 15), angles=range(-30, 31, 5), min_distance=100, seed=0,
+                 use_sprites=True):
+        self.atlas_path = os.path.join(cards_dir, os.path.basename(ATLAS_PATH))
+        self.tables = tables
+        self.tables_dir = tables_dir
+        self.card_size = tuple(card_size)
+        self.num_cards = num_cards
+        self.angles = list(angles)
+        self.min_distance = min_distance
+        self.seed = seed
+        self.use_sprites = use_sprites
+        self._atlas = None
+        self._sprites = None
+        self._table_images = None
+        self._compositor = Compositor()
+
+    def __getstate__(self):
+        # Worker processes reopen the atlas and tables instead of receiving copies
+        state = self.__dict__.copy()
+        state["_atlas"] = None
+        state["_sprites"] = None
+        state["_table_images"] = None
+        state["_compositor"] = Compositor()
+        return state
+
+    @property
+    def atlas(self):
+        if self._atlas is None:
+            self._atlas = load_atlas(self.atlas_path)
+            if self._atlas is None:
+                raise FileNotFoundError(f"{self.atlas_path} not found; build it with executable/card_atlas.py")
+        return self._atlas
+
+    @property
+    def sprite_cache(self):
+        if self._sprites is None and self.use_sprites:
+            self._sprites = load_sprite_cache(self.atlas_path, self.card_size, self.angles)
+        return self._sprites
+
+    @property
+    def num_classes(self):
+        return self.atlas.num_classes
+
+    def _tables(self):
+        if self._table_images is None:
+            self._table_images = []
+            for name, area in self.tables:
+                image = cv2.imread(os.path.join(self.tables_dir, name))
+                if image is None:
+                    raise FileNotFoundError(f"Failed to read table image {name}")
+                h, w = image.shape[:2]
+                x_min, y_min, x_max, y_max = area
+                self._table_images.append((image, (x_min, y_min, x_max % w if x_max < 0 else x_max,
+                                                   y_max % h if y_max < 0 else y_max)))
+        return self._table_images
+
+    def _card_images(self):
+        if self.card_size in self.atlas.sizes:
+            return self.atlas.images(self.card_size), False
+        return self.atlas.images(), True
+
+    def sample(self, index, epoch=None):
+        """
+        Returns (BGR image, labels) where labels is an int32 array of
+        (cls_id, x1, y1, x2, y2) rows in pixels.
+        """
+        rng = np.random.default_rng([self.seed, index] if epoch is None else [self.seed, epoch, index])
+        tables = self._tables()
+        table, (x_min, y_min, x_max, y_max) = tables[rng.integers(len(tables))]
+        image = table.copy()
+        cards, needs_resize = self._card_images()
+        sprites = self.sprite_cache
+
+        labels = []
+        placed_centers = []
+        for _ in range(rng.integers(self.num_cards[0], self.num_cards[1] + 1)):
+            row = int(rng.integers(len(cards)))
+            cls_id = int(np.searchsorted(self.atlas.offsets, row, side='right')) - 1
+            angle = self.angles[rng.integers(len(self.angles))]
+            if sprites is not None:
+                rotated, (box_x1, box_y1, box_x2, box_y2) = sprites.sprite(row, angle)
+            else:
+                card = cards[row]
+                if needs_resize:
+                    card = cv2.resize(card, self.card_size, interpolation=cv2.INTER_AREA)
+                rotated = self._compositor.rotate(card, angle)
+                box_x1, box_y1, box_x2, box_y2 = 0, 0, rotated.shape[1], rotated.shape[0]
+            bound_h, bound_w = rotated.shape[:2]
+
+            max_x = x_max - bound_w
+            max_y = y_max - bound_h
+            if max_x <= x_min or max_y <= y_min:
+                continue
+
+            for _ in range(50):  # Max attempts to find a good position
+                offset_x = int(rng.integers(x_min, max_x + 1))
+                offset_y = int(rng.integers(y_min, max_y + 1))
+                new_center = (offset_x + bound_w // 2, offset_y + bound_h // 2)
+                if all(math.dist(new_center, existing) >= self.min_distance for existing in placed_centers):
+                    break
+            else:
+                break  # Cannot find position without breaking min distance
+
+            box = self._compositor.paste(image, rotated[box_y1:box_y2, box_x1:box_x2],
+                                         offset_x + box_x1, offset_y + box_y1)
+            if box is not None:
+                labels.append((cls_id,) + box)
+            placed_centers.append(new_center)
+
+        return image, np.array(labels, dtype=np.int32).reshape(-1, 5)
+
+    def iter_samples(self, start=0, count=None):
+        index = start
+        while count is None or index < start + count:
+            yield self.sample(index)
+            index += 1
+
+def to_yolo(labels, image_shape):
+    """
+    Converts (cls_id, x1, y1, x2, y2) pixel rows to class ids and normalized
+    (x_center, y_center, w, h) boxes.
+    """
+    h, w = image_shape[:2]
+    xyxy = labels[:, 1:].astype(np.float32)
+    boxes = np.stack([
+        (xyxy[:, 0] + xyxy[:, 2]) / 2 / w,
+        (xyxy[:, 1] + xyxy[:, 3]) / 2 / h,
+        (xyxy[:, 2] - xyxy[:, 0]) / w,
+        (xyxy[:, 3] - xyxy[:, 1]) / h,
+    ], axis=1)
+    return labels[:, 0].astype(np.float32).reshape(-1, 1), boxes.reshape(-1, 4)
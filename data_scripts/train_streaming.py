@@ -0,0 +1,164 @@
+"""
+Trains the detector on synthetic tables composed on the fly by
+synthetic_stream.SyntheticTableGenerator, instead of pre-rendered images.
+
+    python data_scripts/train_streaming.py --data data_scripts/custom.yaml --samples 20000 --epochs 50
+
+Validation still uses the real `val` images of the data YAML. Training
+samples are composed in the DataLoader worker processes (--workers); every
+epoch draws new compositions, sample i of pass p over the data being fixed by
+(--seed, p, i), with ultralytics' own augmentations (mosaic, HSV, flips...)
+applied on top. A resumed run counts its passes from 0 again.
+"""
+
+import math
+import argparse
+import cv2
+import numpy as np
+import torch.distributed as dist
+from torch.utils.data import Sampler
+from ultralytics.data.build import InfiniteDataLoader, seed_worker
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.data.utils import PIN_MEMORY
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import DEFAULT_CFG, colorstr
+from ultralytics.utils.torch_utils import de_parallel, torch_distributed_zero_first
+
+from synthetic_stream import SyntheticTableGenerator, to_yolo
+
+class StreamingYOLODataset(YOLODataset):
+    """
+    YOLODataset whose images and labels come from a SyntheticTableGenerator.
+    Only get_image_and_label() touches the data, so the ultralytics
+    transforms, mosaic included, work unchanged.
+    """
+
+    def __init__(self, generator, length, *args, **kwargs):
+        self.generator = generator
+        self.length = length
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        # Nothing on disk; the names only identify samples in logs and plots
+        return [f"synthetic_{i}.jpg" for i in range(self.length)]
+
+    def get_labels(self):
+        return [
+            dict(im_file=im_file, shape=None, cls=np.zeros((0, 1), dtype=np.float32),
+                 bboxes=np.zeros((0, 4), dtype=np.float32), segments=[], keypoints=None,
+                 normalized=True, bbox_format="xywh")
+            for im_file in self.im_files
+        ]
+
+    def get_image_and_label(self, index):
+        # Indices come from PassSampler: pass * length + sample of the pass
+        epoch, sample = divmod(index, self.length)
+        image, labels = self.generator.sample(sample, epoch)
+        h0, w0 = image.shape[:2]
+        r = self.imgsz / max(h0, w0)
+        if r != 1:
+            image = cv2.resize(image, (min(round(w0 * r), self.imgsz), min(round(h0 * r), self.imgsz)),
+                               interpolation=cv2.INTER_LINEAR if self.augment or r > 1 else cv2.INTER_AREA)
+        cls, bboxes = to_yolo(labels, (h0, w0))
+
+        # Mosaic and mixup pick their extra samples from the buffer
+        self.buffer.append(index)
+        if len(self.buffer) > self.max_buffer_length:
+            self.buffer.pop(0)
+
+        label = dict(self.labels[sample], cls=cls, bboxes=bboxes, img=image, ori_shape=(h0, w0),
+                     resized_shape=image.shape[:2])
+        label.pop("shape", None)
+        label["ratio_pad"] = (image.shape[0] / h0, image.shape[1] / w0)
+        return self.update_labels_info(label)
+
+class PassSampler(Sampler):
+    """
+    Yields pass * length + i for the samples i of this rank, counting the
+    passes over the dataset, so StreamingYOLODataset composes new images on
+    every epoch. Under DDP each rank takes every world_size-th sample, padded
+    like DistributedSampler so all ranks run the same number of batches.
+    """
+
+    def __init__(self, length, rank=0, world_size=1):
+        self.length = length
+        self.rank = rank
+        self.world_size = world_size
+        self.num_samples = math.ceil(length / world_size)
+        self.passes = 0
+
+    def __len__(self):
+        return self.num_samples
+
+    def __iter__(self):
+        start = self.passes * self.length
+        self.passes += 1
+        for k in range(self.num_samples):
+            yield start + (self.rank + k * self.world_size) % self.length
+
+    def set_epoch(self, epoch):
+        # Called by the trainer under DDP; the passes are counted in __iter__
+        pass
+
+# Trainer options of the synthetic dataset, with their defaults. They live on
+# trainer.args so the DDP workers, which rebuild the trainer from its args, and
+# resumed runs get them too.
+SYNTHETIC_ARGS = {"synthetic_samples": 10000, "synthetic_cards": "cards"}
+
+class StreamingTrainer(DetectionTrainer):
+    """
+    DetectionTrainer that trains on a SyntheticTableGenerator built from
+    args.seed and the SYNTHETIC_ARGS overrides.
+    """
+
+    def __init__(self, cfg=DEFAULT_CFG, overrides=None, _callbacks=None):
+        overrides = dict(overrides or {})
+        # Not ultralytics settings; its override check would reject them
+        synthetic = {key: overrides.pop(key, default) for key, default in SYNTHETIC_ARGS.items()}
+        super().__init__(cfg, overrides, _callbacks)
+        for key, value in synthetic.items():
+            setattr(self.args, key, value)
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        if mode != "train":
+            return super().build_dataset(img_path, mode, batch)
+        stride = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        generator = SyntheticTableGenerator(cards_dir=self.args.synthetic_cards, seed=self.args.seed)
+        return StreamingYOLODataset(
+            generator, self.args.synthetic_samples,
+            img_path=img_path, imgsz=self.args.imgsz, batch_size=batch, augment=True, hyp=self.args,
+            rect=False, cache=None, single_cls=self.args.single_cls, stride=stride, pad=0.0,
+            prefix=colorstr("train: "), task=self.args.task, classes=self.args.classes,
+            data=self.data, fraction=1.0,
+        )
+
+    def get_dataloader(self, dataset_path, batch_size=16, rank=0, mode="train"):
+        if mode != "train":
+            return super().get_dataloader(dataset_path, batch_size, rank, mode)
+        with torch_distributed_zero_first(rank):
+            dataset = self.build_dataset(dataset_path, mode, batch_size)
+        sampler = PassSampler(len(dataset), *((dist.get_rank(), dist.get_world_size()) if rank != -1 else (0, 1)))
+        return InfiniteDataLoader(dataset=dataset, batch_size=batch_size, sampler=sampler,
+                                  num_workers=self.args.workers, pin_memory=PIN_MEMORY,
+                                  collate_fn=dataset.collate_fn, worker_init_fn=seed_worker)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train on synthetic tables composed in memory")
+    parser.add_argument("--data", default="data_scripts/custom.yaml", help="dataset YAML (class names, val images)")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--samples", type=int, default=10000, help="synthetic images per epoch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8, help="DataLoader processes composing samples")
+    parser.add_argument("--cards", default="cards", help="directory holding card_atlas.bin")
+    args = parser.parse_args()
+
+    trainer = StreamingTrainer(overrides=dict(
+        model=args.model, data=args.data, epochs=args.epochs, imgsz=args.imgsz, batch=args.batch,
+        workers=args.workers, seed=args.seed, synthetic_samples=args.samples, synthetic_cards=args.cards,
+        # The label plots would show empty placeholder labels
+        plots=False,
+    ))
+    trainer.train()
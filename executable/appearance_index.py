@@ -0,0 +1,113 @@
+# appearance_index.py
+#
+# Inverted index of a results file: for every card class, the sorted frame
+# ranges in which it is detected. Stored next to the results as
+# results_N.appearances, in the same concatenated-.npy layout:
+#   header  int64[3]    (FORMAT_VERSION, number of classes, number of frames)
+#   offsets int64[c+1]  ranges of class i are rows offsets[i]:offsets[i + 1]
+#   starts  int32[m]    first frame of each range
+#   stops   int32[m]    one past the last frame of each range
+#
+# Detections of a card flicker, so frames of one class at most MAX_GAP
+# frames apart are merged into a single range.
+
+import os
+import numpy as np
+from results_store import read_next_array
+
+FORMAT_VERSION = 1
+INDEX_EXTENSION = ".appearances"
+MAX_GAP = 15
+
+def index_path_for(results_path):
+    return os.path.splitext(results_path)[0] + INDEX_EXTENSION
+
+def build_index(results, path=None, max_gap=MAX_GAP):
+    """
+    Builds the index of a results_store.DetectionResults with a few sorts over
+    its columns and writes it next to the results file. Returns the path.
+    """
+    path = path or index_path_for(results.path)
+    cls = np.asarray(results.cls, dtype=np.int64)
+    frames = np.asarray(results.frame_id, dtype=np.int64)
+    num_classes = int(cls.max()) + 1 if cls.size else 0
+
+    # One row per (class, frame), ordered by class then frame
+    order = np.lexsort((frames, cls))
+    cls, frames = cls[order], frames[order]
+    unique = np.ones(cls.size, dtype=bool)
+    unique[1:] = (cls[1:] != cls[:-1]) | (frames[1:] != frames[:-1])
+    cls, frames = cls[unique], frames[unique]
+
+    new_range = np.ones(cls.size, dtype=bool)
+    new_range[1:] = (cls[1:] != cls[:-1]) | (frames[1:] - frames[:-1] > max_gap)
+    first = np.flatnonzero(new_range)
+    last = np.append(first[1:] - 1, cls.size - 1) if first.size else first
+
+    offsets = np.zeros(num_classes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cls[first], minlength=num_classes), out=offsets[1:])
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.lib.format.write_array(fh, np.array([FORMAT_VERSION, num_classes, len(results)], dtype=np.int64))
+        np.lib.format.write_array(fh, offsets)
+        np.lib.format.write_array(fh, frames[first].astype(np.int32))
+        np.lib.format.write_array(fh, (frames[last] + 1).astype(np.int32))
+    os.replace(tmp_path, path)
+    return path
+
+class AppearanceIndex:
+    """
+    Read-only, memory-mapped view of an appearance index. Queries bisect the
+    ranges of one class, so they do not depend on the length of the video.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            header = read_next_array(fh, path)
+            if int(header[0]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported appearance index version {int(header[0])} in {path}")
+            self.offsets = read_next_array(fh, path)
+            self.starts = read_next_array(fh, path)
+            self.stops = read_next_array(fh, path)
+        self.num_classes = int(header[1])
+        self.frame_count = int(header[2])
+
+    def ranges(self, cls_id):
+        """
+        Returns the (starts, stops) arrays of the frame ranges of one class.
+        """
+        if not 0 <= cls_id < self.num_classes:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty
+        s = slice(int(self.offsets[cls_id]), int(self.offsets[cls_id + 1]))
+        return self.starts[s], self.stops[s]
+
+    def next_appearance(self, cls_id, frame_index):
+        """
+        Returns the first frame of the next range of cls_id starting after
+        frame_index, or None.
+        """
+        starts, _ = self.ranges(cls_id)
+        i = int(np.searchsorted(starts, frame_index, side='right'))
+        return int(starts[i]) if i < len(starts) else None
+
+    def previous_appearance(self, cls_id, frame_index):
+        """
+        Returns the first frame of the latest range of cls_id starting before
+        frame_index (the start of the current range when inside one), or None.
+        """
+        starts, _ = self.ranges(cls_id)
+        i = int(np.searchsorted(starts, frame_index, side='left'))
+        return int(starts[i - 1]) if i > 0 else None
+
+def load_index(results):
+    """
+    Opens the index of a DetectionResults, building it first if it is missing
+    or older than the results (runs processed before the index existed).
+    """
+    path = index_path_for(results.path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(results.path):
+        build_index(results, path)
+    return AppearanceIndex(path)
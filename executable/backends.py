@@ -0,0 +1,161 @@
+# backends.py
+#
+# Inference engines behind detector.detect_on_frame. Every backend exposes
+# predict(frames, imgsz, conf) -> one list of (cls_id, x, y, w, h, conf) per frame,
+# with BGR frames in and full-frame pixel coordinates out.
+
+import os
+import cv2
+import numpy as np
+from box_utils import batched_nms
+
+DEFAULT_BACKEND = "ultralytics"
+PT_MODEL_PATH = "my_model/best.pt"
+ONNX_MODEL_PATH = "my_model/best.onnx"
+
+class UltralyticsBackend:
+    name = "ultralytics"
+
+    def __init__(self, model_path=PT_MODEL_PATH, threads=None):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def predict(self, frames, imgsz=640, conf=0.25):
+        results = self.model.predict(source=list(frames), imgsz=imgsz, conf=conf, verbose=False)
+        return [_extract_boxes(r) for r in results]
+
+def _extract_boxes(result):
+    boxes = []
+    for box in result.boxes:
+        cls_id = int(box.cls.item())
+        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+        w = x2 - x1
+        h = y2 - y1
+        conf = float(box.conf.item())
+        boxes.append((cls_id, x1, y1, w, h, conf))
+    return boxes
+
+class OnnxBackend:
+    """
+    ONNX Runtime CPU engine for a YOLOv8 model exported with export_onnx().
+    Letterboxing and NMS are done here in NumPy, so torch is not needed.
+    """
+    name = "onnx"
+
+    def __init__(self, model_path=ONNX_MODEL_PATH, quantize=False, threads=None, iou=0.7, max_det=300):
+        import onnxruntime as ort
+        if quantize:
+            model_path = quantize_model(model_path)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.iou = iou
+        self.max_det = max_det
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        # Dimensions exported as dynamic show up as strings
+        self.static_batch = batch if isinstance(batch, int) else None
+        self.static_size = height if isinstance(height, int) else None
+
+    def predict(self, frames, imgsz=640, conf=0.25):
+        size = self.static_size or imgsz
+        prepared = [letterbox(frame, size) for frame in frames]
+        blob = np.stack([image for image, _ in prepared])
+
+        if self.static_batch == 1:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: blob[i:i + 1]})[0]
+                                      for i in range(len(blob))])
+        else:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+
+        return [self._postprocess(output, meta, frame.shape, conf)
+                for output, (_, meta), frame in zip(outputs, prepared, frames)]
+
+    def _postprocess(self, output, meta, frame_shape, conf):
+        # YOLOv8 head: (4 + num_classes, anchors) with boxes as (cx, cy, w, h)
+        pred = output.T
+        class_scores = pred[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(pred)), classes]
+        mask = scores > conf
+        pred, classes, scores = pred[mask], classes[mask], scores[mask]
+        if not len(pred):
+            return []
+
+        cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        keep = batched_nms(xyxy, scores, classes, self.iou)[:self.max_det]
+
+        ratio, pad_x, pad_y = meta
+        xyxy = xyxy[keep]
+        xyxy[:, [0, 2]] = np.clip((xyxy[:, [0, 2]] - pad_x) / ratio, 0, frame_shape[1])
+        xyxy[:, [1, 3]] = np.clip((xyxy[:, [1, 3]] - pad_y) / ratio, 0, frame_shape[0])
+
+        boxes = []
+        for (x1, y1, x2, y2), cls_id, score in zip(xyxy.astype(int).tolist(), classes[keep], scores[keep]):
+            boxes.append((int(cls_id), x1, y1, x2 - x1, y2 - y1, float(score)))
+        return boxes
+
+def letterbox(frame, size, pad_value=114):
+    """
+    Resizes a BGR frame to fit a size x size square, keeping its aspect ratio,
+    and converts it to a normalised RGB CHW float32 array.
+
+    Returns:
+        image (np.array), (ratio, pad_x, pad_y) to map boxes back to the frame
+    """
+    h, w = frame.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    canvas = np.full((size, size, 3), pad_value, dtype=np.uint8)
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    image = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(image), (ratio, left, top)
+
+def export_onnx(pt_path=PT_MODEL_PATH, imgsz=640):
+    """
+    Exports the ultralytics weights to ONNX with a dynamic batch axis. Returns the new path.
+    """
+    from ultralytics import YOLO
+    return YOLO(pt_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+def quantize_model(onnx_path):
+    """
+    Writes a dynamically INT8-quantized copy next to the model (best.int8.onnx),
+    reusing it while it is newer than the source. Returns its path.
+    """
+    quantized_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+    if not os.path.exists(quantized_path) or os.path.getmtime(quantized_path) < os.path.getmtime(onnx_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+def create_backend(name=DEFAULT_BACKEND, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+if __name__ == "__main__":
+    # Usage: python executable/backends.py [--int8]
+    import sys
+    onnx_path = export_onnx()
+    print(f"Exported {onnx_path}")
+    if "--int8" in sys.argv:
+        print(f"Quantized {quantize_model(onnx_path)}")
@@ -0,0 +1,176 @@
+# batch.py
+#
+# Headless batch processing: runs VideoPipeline over many recordings with a
+# pool of worker processes, each holding its own model.
+#
+#   python executable/batch.py VODS_DIR [more dirs or videos] --workers 4 --threads 4
+#
+# Every video becomes a run in the results catalog, just like "Process Video"
+# in the app, so its results can be opened there afterwards. Workers start
+# with OMP/MKL/OpenBLAS limited to --threads threads, and OpenCV and the
+# detector backend are set to the same, so workers x threads should not
+# exceed the number of cores.
+
+import os
+import sys
+import time
+import json
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import detector
+from pipeline import VideoPipeline
+from run_catalog import RunCatalog
+from tracker import KeyframeTracker, DEFAULT_KEYFRAME_INTERVAL
+from frame_gate import ChangeGate, GatedDetector, DEFAULT_CHANGE_THRESHOLD
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Thread pools that read these once, when the library is loaded (torch, numpy's
+# BLAS). Workers import numpy and cv2 while unpickling this module, before any
+# initializer runs, so the variables must already be in their environment.
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def find_videos(paths):
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            videos.append(path)
+    return videos
+
+@contextlib.contextmanager
+def worker_thread_env(threads):
+    """
+    Sets the thread variables of _THREAD_ENV_VARS in this process's
+    environment, which spawned workers start with, and restores them after.
+    """
+    saved = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def _init_worker(args, threads):
+    cv2.setNumThreads(threads)
+    detector.configure(args, threads=threads)
+    # Load once per worker, before the first video
+    detector.get_model()
+
+def _process_video(video_path, args):
+    catalog = RunCatalog(args.results_dir)
+    settings = dict(detector.current_settings(), batch_size=args.batch_size,
+                    keyframe_interval=args.keyframe_interval, change_threshold=args.change_threshold,
+                    render_on_playback=not args.annotate, worker_threads=args.threads)
+    run = catalog.create_run(video_path, settings, annotated=args.annotate)
+
+    frame_detector = None
+    if args.keyframe_interval:
+        frame_detector = KeyframeTracker(keyframe_interval=args.keyframe_interval)
+    if args.change_threshold is not None:
+        frame_detector = GatedDetector(frame_detector, ChangeGate(threshold=args.change_threshold))
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    pipeline = VideoPipeline(video_path, run["output_video"], run["results_path"], fps,
+                             batch_size=args.batch_size, frame_detector=frame_detector)
+    try:
+        if not pipeline.run():
+            raise IOError(f"Failed to open video: {video_path}")
+    except Exception as e:
+        catalog.fail_run(run["id"], e)
+        raise
+    catalog.finish_run(run["id"], pipeline.stats)
+    return run["id"], pipeline.stats
+
+def parse_args(argv):
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Process a directory of recordings without the UI")
+    parser.add_argument("inputs", nargs="+", help="video files or directories searched recursively")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes, each with its own model (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="inference threads per worker (default: cores / workers, or 4)")
+    parser.add_argument("--batch-size", type=int, default=detector.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--keyframes", dest="keyframe_interval", type=int, nargs="?",
+                        const=DEFAULT_KEYFRAME_INTERVAL, metavar="N",
+                        help="track between keyframes every N frames (default: %(const)s)")
+    parser.add_argument("--skip-unchanged", dest="change_threshold", type=float, nargs="?",
+                        const=DEFAULT_CHANGE_THRESHOLD, metavar="THRESHOLD",
+                        help="reuse detections on frames that barely change (default threshold: %(const)s)")
+    parser.add_argument("--annotate", action="store_true",
+                        help="also encode output_N.mp4 with the boxes drawn in")
+    parser.add_argument("--results-dir", default="results")
+    parser.add_argument("--json", metavar="PATH", help="write per-video and aggregate stats to this file")
+    detector.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.workers is None and args.threads is None:
+        args.threads = min(4, cpus)
+    if args.workers is None:
+        args.workers = max(1, cpus // args.threads)
+    if args.threads is None:
+        args.threads = max(1, cpus // args.workers)
+    return args
+
+def main(argv):
+    args = parse_args(argv)
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No videos found")
+        return 1
+    print(f"Processing {len(videos)} videos with {args.workers} workers x {args.threads} threads")
+
+    per_video = []
+    failures = 0
+    start = time.perf_counter()
+    # spawn: workers must not inherit the parent's half-initialised thread pools.
+    # Workers are started by submit(), so all of them start inside worker_thread_env
+    with worker_thread_env(args.threads), \
+            ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                initializer=_init_worker, initargs=(args, args.threads)) as pool:
+        futures = {pool.submit(_process_video, video, args): video for video in videos}
+        for future in as_completed(futures):
+            video = futures[future]
+            try:
+                run_id, stats = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {video}: {e}")
+                continue
+            fps = stats["frames"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            per_video.append(dict(stats, video=video, run_id=run_id, fps=fps))
+            print(f"[run {run_id}] {video}: {stats['frames']} frames in {stats['elapsed']:.1f}s ({fps:.1f} FPS)")
+    wall = time.perf_counter() - start
+
+    frames = sum(v["frames"] for v in per_video)
+    summary = {
+        "videos": len(per_video),
+        "failed": failures,
+        "frames": frames,
+        "wall_seconds": wall,
+        "fps": frames / wall if wall else 0.0,
+        "workers": args.workers,
+        "threads": args.threads,
+    }
+    print(f"Total: {len(per_video)} videos, {frames} frames in {wall:.1f}s "
+          f"({summary['fps']:.1f} FPS aggregate), {failures} failed")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"summary": summary, "videos": per_video}, f, indent=2)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
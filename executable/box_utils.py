@@ -0,0 +1,61 @@
+# box_utils.py
+
+import numpy as np
+
+def intersection_matrix(boxes_a, boxes_b):
+    """
+    Pairwise intersection areas between two arrays of (x1, y1, x2, y2) boxes.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    return np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+def box_areas(boxes):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two arrays of (x1, y1, x2, y2) boxes.
+
+    Returns:
+        np.array of shape (len(boxes_a), len(boxes_b))
+    """
+    inter = intersection_matrix(boxes_a, boxes_b)
+    area_a = box_areas(boxes_a)
+    area_b = box_areas(boxes_b)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+def nms(boxes, scores, iou_threshold):
+    """
+    Greedy non-maximum suppression over (x1, y1, x2, y2) boxes.
+
+    Returns:
+        np.array of kept indices, highest score first
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores))
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        overlaps = iou_matrix(boxes[best:best + 1], boxes[order[1:]])[0]
+        order = order[1:][overlaps <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+def batched_nms(boxes, scores, classes, iou_threshold):
+    """
+    Per-class NMS: boxes of different classes never suppress each other.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if boxes.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Shift each class into its own coordinate range so one NMS pass handles all classes
+    offsets = np.asarray(classes, dtype=np.float32)[:, None] * (boxes.max() + 1)
+    return nms(boxes + offsets, scores, iou_threshold)
@@ -0,0 +1,7 @@
+# onnx_runtime_hook.py
+# PyInstaller runtime hook for the ONNX-only build: torch and ultralytics are
+# not bundled, so the packaged app must default to the onnx backend.
+
+import os
+
+os.environ.setdefault("PTCG_BACKEND", "onnx")
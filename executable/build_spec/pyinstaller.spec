@@ -1,19 +1,30 @@
 # pyinstaller.spec
+#
+# Set PTCG_BACKEND=onnx when building to ship the ONNX Runtime engine only:
+# torch/ultralytics are excluded and my_model/best.onnx is bundled instead.
+#
+# Card art ships as the single packed atlas; build it first with
+# `python executable/card_atlas.py`.
+
+import os
 
 block_cipher = None
 
+ONNX_ONLY = os.environ.get("PTCG_BACKEND") == "onnx"
+model_datas = [('my_model/best.onnx', 'my_model')] if ONNX_ONLY else [('my_model/best.pt', 'my_model')]
+
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
     datas=[
-        ('cards/*.jpg', 'cards'),      # include all card images
+        ('cards/card_atlas.bin', 'cards'),  # every card image, packed
         ('resources.qrc', '.'),        # optional: include raw .qrc
-    ],
+    ] + model_datas,
     hiddenimports=[],
     hookspath=[],
-    runtime_hooks=[],
-    excludes=[],
+    runtime_hooks=['build_spec/onnx_runtime_hook.py'] if ONNX_ONLY else [],
+    excludes=['torch', 'torchvision', 'ultralytics'] if ONNX_ONLY else [],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
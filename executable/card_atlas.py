@@ -0,0 +1,187 @@
+# card_atlas.py
+#
+# Every card image packed into one memory-mappable file, built once from the
+# cards/ tree (sv1-N/*.png and the aug_*.jpg files of augmentation.py):
+#
+#   python executable/card_atlas.py [--size 245x342 --size 100x140 ...]
+#
+# Like the results store, the file is a plain concatenation of .npy arrays:
+#   header      int64[3]          (FORMAT_VERSION, number of classes, number of sizes)
+#   sizes       int32[k, 2]       (w, h) of each stored size
+#   offsets     int64[c+1]        images of class i are rows offsets[i]:offsets[i + 1]
+#   is_original bool[n]           the card's own image (first row of its class) vs an augmentation
+#   images      uint8[n, h, w, 4] BGRA, one array per size, in the order of `sizes`
+#
+# Opening the atlas maps it without reading any pixels, and every image is a
+# zero-copy view into the file.
+
+import os
+import re
+import argparse
+import numpy as np
+import cv2
+from results_store import read_next_array
+
+FORMAT_VERSION = 1
+CARDS_DIR = "cards"
+ATLAS_PATH = os.path.join(CARDS_DIR, "card_atlas.bin")
+# Native size of the card scans, and the size the synthetic table scripts paste
+DEFAULT_SIZES = ((245, 342), (100, 140))
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+_CARD_FOLDER = re.compile(r"sv1-(\d+)$")
+
+def list_card_images(cards_dir=CARDS_DIR):
+    """
+    Returns {cls_id: [image paths]} for the cards/sv1-N folders (class N-1),
+    with the card's own image first and augmentations after it.
+    """
+    images = {}
+    for folder in os.listdir(cards_dir):
+        match = _CARD_FOLDER.match(folder)
+        folder_path = os.path.join(cards_dir, folder)
+        if not match or not os.path.isdir(folder_path):
+            continue
+        files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+        # sv1-N.png before aug_*.jpg
+        files.sort(key=lambda f: not f.startswith(folder))
+        if files:
+            images[int(match.group(1)) - 1] = [os.path.join(folder_path, f) for f in files]
+    return images
+
+def _to_bgra(image):
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return image
+
+def build_atlas(cards_dir=CARDS_DIR, atlas_path=ATLAS_PATH, sizes=DEFAULT_SIZES):
+    """
+    Decodes every card image once and writes the atlas. Images are streamed
+    to disk one at a time, so memory use does not grow with the card count.
+    Returns the number of images packed.
+    """
+    images = list_card_images(cards_dir)
+    num_classes = max(images) + 1 if images else 0
+    paths, counts, is_original = [], [], []
+    for cls_id in range(num_classes):
+        class_paths = images.get(cls_id, [])
+        folder = f"sv1-{cls_id + 1}"
+        paths.extend(class_paths)
+        counts.append(len(class_paths))
+        is_original.extend(os.path.basename(p).startswith(folder) for p in class_paths)
+    offsets = np.zeros(num_classes + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    tmp_path = atlas_path + ".tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.lib.format.write_array(fh, np.array([FORMAT_VERSION, num_classes, len(sizes)], dtype=np.int64))
+        np.lib.format.write_array(fh, np.array(sizes, dtype=np.int32).reshape(-1, 2))
+        np.lib.format.write_array(fh, offsets)
+        np.lib.format.write_array(fh, np.array(is_original, dtype=bool))
+        for w, h in sizes:
+            np.lib.format.write_array_header_1_0(fh, {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.uint8)),
+                "fortran_order": False,
+                "shape": (len(paths), h, w, 4),
+            })
+            for path in paths:
+                image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+                if image is None:
+                    raise ValueError(f"Failed to read {path}")
+                image = cv2.resize(_to_bgra(image), (w, h), interpolation=cv2.INTER_AREA)
+                fh.write(np.ascontiguousarray(image).tobytes())
+    os.replace(tmp_path, atlas_path)
+    return len(paths)
+
+class CardAtlas:
+    """
+    Read-only, memory-mapped view of an atlas file.
+    """
+
+    def __init__(self, path=ATLAS_PATH):
+        self.path = path
+        with open(path, 'rb') as fh:
+            header = read_next_array(fh, path)
+            if int(header[0]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported card atlas version {int(header[0])} in {path}")
+            self.sizes = [tuple(int(v) for v in size) for size in read_next_array(fh, path)]
+            self.offsets = read_next_array(fh, path)
+            self.is_original = read_next_array(fh, path)
+            self._images = {size: read_next_array(fh, path) for size in self.sizes}
+        self.num_classes = int(header[1])
+
+    def __len__(self):
+        return len(self.is_original)
+
+    def images(self, size=None):
+        """
+        Returns the (n, h, w, 4) array of every image at size (w, h), by
+        default the first (largest) stored size.
+        """
+        return self._images[tuple(size) if size is not None else self.sizes[0]]
+
+    def rows(self, cls_id):
+        if not 0 <= cls_id < self.num_classes:
+            return range(0)
+        return range(int(self.offsets[cls_id]), int(self.offsets[cls_id + 1]))
+
+    def card(self, cls_id, size=None):
+        """
+        Returns the card's own image (not an augmentation) as a BGRA view, or
+        None if the class has no image.
+        """
+        for row in self.rows(cls_id):
+            if self.is_original[row]:
+                return self.images(size)[row]
+        return None
+
+    def random_image(self, rng=None, size=None, originals_only=False):
+        """
+        Picks a random image of any class with rng, a numpy Generator (a new
+        default_rng() if None). Returns (cls_id, BGRA view).
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        candidates = np.flatnonzero(self.is_original) if originals_only else None
+        count = len(candidates) if candidates is not None else len(self)
+        if count == 0:
+            return None, None
+        row = int(rng.integers(count))
+        if candidates is not None:
+            row = int(candidates[row])
+        cls_id = int(np.searchsorted(self.offsets, row, side='right')) - 1
+        return cls_id, self.images(size)[row]
+
+_atlas = None
+
+def load_atlas(path=ATLAS_PATH):
+    """
+    Returns the shared atlas, or None if it has not been built. Rebuild it
+    after adding cards or rerunning augmentation.py.
+    """
+    global _atlas
+    if _atlas is None or _atlas.path != path:
+        if not os.path.exists(path):
+            return None
+        _atlas = CardAtlas(path)
+    return _atlas
+
+def parse_size(text):
+    """
+    Parses a "WxH" card size, as taken by the --size options, into (w, h).
+    """
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the cards/ images into a memory-mappable atlas")
+    parser.add_argument("--cards", default=CARDS_DIR)
+    parser.add_argument("--output", default=None, help="Defaults to <cards>/card_atlas.bin")
+    parser.add_argument("--size", type=parse_size, action="append",
+                        help="Stored size as WxH; repeat for several (default: 245x342 and 100x140)")
+    args = parser.parse_args()
+    output = args.output or os.path.join(args.cards, os.path.basename(ATLAS_PATH))
+    count = build_atlas(args.cards, output, args.size or DEFAULT_SIZES)
+    print(f"Packed {count} card images into {output} ({os.path.getsize(output) / 2**20:.1f} MiB)")
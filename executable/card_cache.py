@@ -0,0 +1,118 @@
+# card_cache.py
+#
+# LRU cache of card art decoded and scaled to the size it is shown at.
+#
+# Images are decoded and scaled as QImages on a background thread (QImage is
+# safe to use off the GUI thread, QPixmap is not); the first get() on the GUI
+# thread turns the entry into a QPixmap, which is what later clicks reuse.
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from card_atlas import load_atlas
+
+CARDS_DIR = "cards"
+DEFAULT_MAX_ENTRIES = 128
+
+def card_image_path(cls_id):
+    return os.path.join(".", CARDS_DIR, f"sv1-{cls_id + 1}", f"sv1-{cls_id + 1}.png")
+
+def atlas_qimage(card):
+    """
+    Wraps a BGRA atlas image (ARGB32 on little-endian) in a QImage. The atlas
+    is mapped read-only and Qt may convert an image in place, so only read-only
+    operations such as scaled() or copy() may be used on the result.
+    """
+    h, w = card.shape[:2]
+    return QImage(card.data, w, h, 4 * w, QImage.Format_ARGB32)
+
+def load_scaled_image(cls_id, size):
+    """
+    Decodes a card image and scales it to fit size (w, h), keeping its aspect
+    ratio. Returns None if the card has no image. Reads from the card atlas
+    when it has been built, otherwise decodes the card's PNG.
+    """
+    atlas = load_atlas()
+    if atlas is not None:
+        card = atlas.card(cls_id)
+        if card is None:
+            return None
+        return atlas_qimage(card).scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    image = QImage(card_image_path(cls_id))
+    if image.isNull():
+        return None
+    return image.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+class CardArtCache:
+    """
+    Scaled card art keyed by (cls_id, (w, h)). prefetch() fills it in the
+    background; get() returns a QPixmap, loading synchronously on a miss.
+    Cards without an image are cached too, as None.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, workers=1):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="card-art")
+
+    def get(self, cls_id, size):
+        """
+        Returns the card's QPixmap scaled to size, or None if it has no image.
+        Must be called on the GUI thread.
+        """
+        key = (int(cls_id), tuple(size))
+        with self._lock:
+            found = key in self._entries
+            if found:
+                self._entries.move_to_end(key)
+                entry = self._entries[key]
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = load_scaled_image(*key)
+        if isinstance(entry, QImage):
+            entry = QPixmap.fromImage(entry)
+        self._store(key, entry)
+        return entry
+
+    def prefetch(self, cls_ids, size):
+        """
+        Queues loading of the given cards that are neither cached nor queued.
+        """
+        size = tuple(size)
+        with self._lock:
+            keys = [(int(c), size) for c in cls_ids]
+            keys = [k for k in dict.fromkeys(keys) if k not in self._entries and k not in self._pending]
+            self._pending.update(keys)
+        for key in keys:
+            self._executor.submit(self._load, key)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, key):
+        try:
+            image = load_scaled_image(*key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+        with self._lock:
+            # get() may have loaded it meanwhile, possibly already as a QPixmap
+            if key in self._entries:
+                return
+        self._store(key, image)
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,10 +1,136 @@
 import cv2
 import os
 import random
-from ultralytics import YOLO
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import backends
+import results_store
+from box_utils import intersection_matrix, box_areas
 
-# Load the actual YOLO model
-model = YOLO("my_model/best.pt")
+# Inference engine, see backends.py. Can be overridden with the PTCG_BACKEND
+# environment variable or set_backend() before the model starts loading.
+BACKEND = os.environ.get("PTCG_BACKEND", backends.DEFAULT_BACKEND)
+BACKEND_OPTIONS = {}
+
+IMGSZ = 640
+CONF = 0.25
+
+# The model is loaded on a background thread (see load_model_async) so that
+# importing this module, and showing the UI, does not wait for torch/ultralytics
+_model_future = None
+_model_lock = threading.Lock()
+
+# Number of frames sent to the model per predict call in the batched path
+DEFAULT_BATCH_SIZE = 8
+
+# Play-area regions of interest as (x, y, w, h) fractions of the frame. Each
+# region is cropped and sent to the model on its own, so the cards get more of
+# the imgsz input than when the whole stream layout is downscaled. None runs
+# on the full frame; AUTO_ROIS estimates the regions from the first frames
+# with enough detections (see set_rois / estimate_rois).
+AUTO_ROIS = "auto"
+ROIS = None
+_estimated_rois = None
+MIN_BOXES_FOR_ROI_ESTIMATE = 3
+
+# Tiled inference for high-resolution frames: each frame (or region) is split
+# into overlapping TILE_SIZE x TILE_SIZE tiles that are batched through the
+# model, so small cards are not squashed into a single imgsz input. Tiles whose
+# grayscale standard deviation is below TILE_MIN_STDDEV are skipped as empty.
+TILE_SIZE = None
+TILE_OVERLAP = 0.2
+TILE_MIN_STDDEV = 8.0
+
+# Merging boxes found in several regions/tiles of one frame: a box is dropped
+# when it overlaps a kept box of the same class by more than MERGE_IOU, or when
+# more than MERGE_CONTAINED of it lies inside one (a card cut by a tile edge)
+MERGE_IOU = 0.7
+MERGE_CONTAINED = 0.6
+REGION_EDGE_MARGIN = 2
+
+def add_arguments(parser):
+    """
+    Adds the detector command-line options shared by the app and the batch CLI.
+    """
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS), default=BACKEND,
+                        help="inference engine (default: %(default)s, or $PTCG_BACKEND)")
+    parser.add_argument("--model", help="model file (default: my_model/best.pt or my_model/best.onnx)")
+    parser.add_argument("--int8", action="store_true",
+                        help="onnx backend only: use a dynamically INT8-quantized copy of the model")
+    parser.add_argument("--roi", action="append", metavar="X,Y,W,H",
+                        help="play-area region as fractions of the frame, repeatable (one per player side), "
+                             "or 'auto' to estimate it from the first detections")
+    parser.add_argument("--tile", type=int, nargs="?", const=IMGSZ, metavar="SIZE",
+                        help="tiled inference for high-resolution frames (default tile size: %(const)s px)")
+    parser.add_argument("--tile-overlap", type=float, default=TILE_OVERLAP,
+                        help="overlap between neighbouring tiles as a fraction of the tile size")
+
+def configure(args, **backend_options):
+    """
+    Applies the options added by add_arguments(); backend_options are passed
+    to the backend along with the model options.
+    """
+    if args.model:
+        backend_options["model_path"] = args.model
+    if args.int8:
+        backend_options["quantize"] = True
+    set_backend(args.backend, **backend_options)
+    if args.roi == [AUTO_ROIS]:
+        set_rois(AUTO_ROIS)
+    elif args.roi:
+        set_rois([tuple(float(v) for v in roi.split(",")) for roi in args.roi])
+    if args.tile:
+        set_tiling(args.tile, args.tile_overlap)
+
+def current_settings():
+    """
+    Returns the detection settings in effect, as recorded with each processed run.
+    """
+    return {
+        "backend": BACKEND,
+        "backend_options": dict(BACKEND_OPTIONS),
+        "imgsz": IMGSZ,
+        "conf": CONF,
+        "rois": ROIS,
+        "tile_size": TILE_SIZE,
+        "tile_overlap": TILE_OVERLAP,
+    }
+
+def set_backend(name, **options):
+    global BACKEND, BACKEND_OPTIONS
+    with _model_lock:
+        if _model_future is not None:
+            raise RuntimeError("set_backend() must be called before the model starts loading")
+        BACKEND = name
+        BACKEND_OPTIONS = options
+
+def _load_model():
+    loaded = backends.create_backend(BACKEND, **BACKEND_OPTIONS)
+    # The first predict call sets up the inference graph; pay that here rather than on the first frame
+    loaded.predict([np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8)], imgsz=IMGSZ, conf=CONF)
+    return loaded
+
+def load_model_async():
+    """
+    Starts loading the model in the background if it is not loading yet.
+
+    Returns:
+        concurrent.futures.Future resolving to the loaded backend
+    """
+    global _model_future
+    with _model_lock:
+        if _model_future is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            _model_future = executor.submit(_load_model)
+            executor.shutdown(wait=False)
+    return _model_future
+
+def get_model():
+    """
+    Returns the loaded backend, waiting for the background load if needed.
+    """
+    return load_model_async().result()
 
 def load_yolo_detections(txt_path, frame_width, frame_height):
     boxes = []
@@ -31,55 +157,232 @@ def load_detection_video(video_path):
     return cv2.VideoCapture(video_path)
 
 def load_detection_results(txt_path):
-    detection_data = {}
-    current_frame = None
-    with open(txt_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("Frame"):
-                parts = line.split(":")
-                current_frame = int(parts[0].split()[1])
-                detection_data[current_frame] = []
-            elif current_frame is not None and ',' in line:
-                parts = line.split(",")
-                if len(parts) == 5:
-                    name, x, y, w, h = parts
-                    detection_data[current_frame].append((name, int(x), int(y), int(w), int(h)))
-    return detection_data
+    if txt_path.endswith(results_store.RESULTS_EXTENSION):
+        return results_store.DetectionResults(txt_path)
+    return dict(results_store.iter_text_results(txt_path))
 
-def detect_on_frame(frame, return_boxes=False):
-    height, width = frame.shape[:2]
-    results = model.predict(source=frame, imgsz=640, conf=0.25, verbose=False)
+def set_rois(rois):
+    """
+    Sets the play-area regions used by every detection call: a list of
+    (x, y, w, h) fractions of the frame, AUTO_ROIS, or None for the full frame.
+    """
+    global ROIS, _estimated_rois
+    ROIS = rois
+    _estimated_rois = None
 
-    boxes = []
-    for r in results:
-        for box in r.boxes:
-            cls_id = int(box.cls.item())
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-            w = x2 - x1
-            h = y2 - y1
-            boxes.append((cls_id, x1, y1, w, h))
+def reset_estimated_rois():
+    # Call when switching to another video so AUTO_ROIS estimates again
+    global _estimated_rois
+    _estimated_rois = None
+
+def estimate_rois(all_boxes, frame_shape, margin=0.05):
+    """
+    Estimates one region per player side from detections on full frames:
+    boxes above and below the middle of the frame are enclosed separately,
+    padded by `margin` of the frame size, and merged if the two overlap.
+
+    Returns:
+        List[Tuple[x, y, w, h]] as fractions of the frame, or None without boxes
+    """
+    height, width = frame_shape[:2]
+    sides = {}
+    for boxes in all_boxes:
+        for (_, x, y, w, h, *_) in boxes:
+            side = 0 if y + h / 2 < height / 2 else 1
+            sides.setdefault(side, []).append((x, y, x + w, y + h))
+    if not sides:
+        return None
+
+    regions = []
+    for side in sorted(sides):
+        corners = np.array(sides[side], dtype=np.float32)
+        x1 = max(corners[:, 0].min() - margin * width, 0)
+        y1 = max(corners[:, 1].min() - margin * height, 0)
+        x2 = min(corners[:, 2].max() + margin * width, width)
+        y2 = min(corners[:, 3].max() + margin * height, height)
+        regions.append([x1, y1, x2, y2])
+
+    if len(regions) == 2 and regions[0][3] > regions[1][1]:
+        top, bottom = regions
+        regions = [[min(top[0], bottom[0]), top[1], max(top[2], bottom[2]), bottom[3]]]
+
+    return [(float(x1 / width), float(y1 / height), float((x2 - x1) / width), float((y2 - y1) / height))
+            for x1, y1, x2, y2 in regions]
+
+def _active_rois(rois):
+    if rois is None:
+        rois = ROIS
+    if rois == AUTO_ROIS:
+        return _estimated_rois
+    return rois
+
+def set_tiling(tile_size, overlap=TILE_OVERLAP):
+    """
+    Enables tiled inference with tile_size pixel tiles (None disables it).
+    Tiles work best when tile_size matches IMGSZ, so they are not rescaled.
+    """
+    global TILE_SIZE, TILE_OVERLAP
+    TILE_SIZE = tile_size
+    TILE_OVERLAP = overlap
+
+def _tile_starts(start, end, tile_size, step):
+    if end - start <= tile_size:
+        return [start]
+    starts = list(range(start, end - tile_size, step))
+    return starts + [end - tile_size]
+
+def _frame_regions(frame_shape, rois, tile_size, overlap):
+    """
+    Pixel areas (x1, y1, x2, y2) of one frame to send to the model.
+    """
+    height, width = frame_shape[:2]
+    if rois:
+        areas = []
+        for (rx, ry, rw, rh) in rois:
+            x1, y1 = int(rx * width), int(ry * height)
+            x2, y2 = min(int((rx + rw) * width), width), min(int((ry + rh) * height), height)
+            if x2 > x1 and y2 > y1:
+                areas.append((x1, y1, x2, y2))
+    else:
+        areas = [(0, 0, width, height)]
+
+    if not tile_size:
+        return areas
+
+    step = max(int(tile_size * (1 - overlap)), 1)
+    tiles = []
+    for (x1, y1, x2, y2) in areas:
+        for ty in _tile_starts(y1, y2, tile_size, step):
+            for tx in _tile_starts(x1, x2, tile_size, step):
+                tiles.append((tx, ty, min(tx + tile_size, x2), min(ty + tile_size, y2)))
+    return tiles
+
+def _has_content(image):
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return float(gray.std()) >= TILE_MIN_STDDEV
+
+def _merge_region_boxes(candidates):
+    """
+    Merges (box, cut_by_region_edge) candidates found in the regions of one
+    frame. Whole boxes win over boxes touching an inner region edge, then the
+    more confident box wins.
+    """
+    boxes = [box for box, _ in candidates]
+    xyxy = np.array([(x, y, x + w, y + h) for (_, x, y, w, h, *_) in boxes], dtype=np.float32)
+    inter = intersection_matrix(xyxy, xyxy)
+    areas = box_areas(xyxy)
+    iou = inter / np.maximum(areas[:, None] + areas[None, :] - inter, 1e-6)
+    contained = inter / np.maximum(areas[:, None], 1e-6)
+
+    scores = [box[5] if len(box) > 5 else 1.0 for box in boxes]
+    order = sorted(range(len(boxes)), key=lambda i: (candidates[i][1], -scores[i]))
+    kept = []
+    for i in order:
+        duplicate = any(
+            boxes[k][0] == boxes[i][0] and (iou[i, k] > MERGE_IOU or contained[i, k] > MERGE_CONTAINED)
+            for k in kept
+        )
+        if not duplicate:
+            kept.append(i)
+    return [boxes[i] for i in sorted(kept)]
+
+def _predict_batched(images, batch_size, imgsz):
+    model = get_model()
+    all_boxes = []
+    for start in range(0, len(images), batch_size):
+        chunk = list(images[start:start + batch_size])
+        all_boxes.extend(model.predict(chunk, imgsz=imgsz, conf=CONF))
+    return all_boxes
+
+def detect_on_frame(frame, return_boxes=False):
+    boxes = detect_boxes_batch([frame])[0]
 
     image = draw_detections(frame.copy(), boxes)
     if return_boxes:
         return image, boxes
     return image
 
+def detect_boxes_batch(frames, batch_size=DEFAULT_BATCH_SIZE, imgsz=None, rois=None):
+    """
+    Runs detection on a list of frames, sending up to batch_size frames
+    through the model in a single predict call. With regions of interest
+    (rois, or the module-level ROIS) and/or tiling (TILE_SIZE), every region
+    or tile of every frame is cropped and all crops go through the model
+    together; boxes are mapped back to full-frame coordinates and merged
+    across region borders.
+
+    Returns:
+        List[List[Tuple[cls_id, x, y, w, h, conf]]], one list per input frame
+    """
+    global _estimated_rois
+    imgsz = imgsz or IMGSZ
+    active_rois = _active_rois(rois)
+
+    if not active_rois and not TILE_SIZE:
+        all_boxes = _predict_batched(frames, batch_size, imgsz)
+    else:
+        images, owners = [], []
+        for frame_index, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            for (x1, y1, x2, y2) in _frame_regions(frame.shape, active_rois, TILE_SIZE, TILE_OVERLAP):
+                image = frame[y1:y2, x1:x2]
+                if TILE_SIZE and not _has_content(image):
+                    continue
+                images.append(image)
+                # Region edges that are not frame edges can cut a card in two
+                inner_edges = (x1 > 0, y1 > 0, x2 < width, y2 < height)
+                owners.append((frame_index, x1, y1, x2, y2, inner_edges))
+
+        regions_per_frame = max(len(images) // max(len(frames), 1), 1)
+        region_boxes = _predict_batched(images, batch_size * regions_per_frame, imgsz)
+
+        candidates = [[] for _ in frames]
+        for (frame_index, x1, y1, x2, y2, inner_edges), boxes in zip(owners, region_boxes):
+            for (cls_id, x, y, w, h, *rest) in boxes:
+                cut = ((inner_edges[0] and x <= REGION_EDGE_MARGIN) or
+                       (inner_edges[1] and y <= REGION_EDGE_MARGIN) or
+                       (inner_edges[2] and x + w >= x2 - x1 - REGION_EDGE_MARGIN) or
+                       (inner_edges[3] and y + h >= y2 - y1 - REGION_EDGE_MARGIN))
+                candidates[frame_index].append(((cls_id, x + x1, y + y1, w, h, *rest), cut))
+
+        all_boxes = [_merge_region_boxes(c) if len(c) > 1 else [box for box, _ in c] for c in candidates]
+
+    if (rois or ROIS) == AUTO_ROIS and not active_rois:
+        if sum(len(boxes) for boxes in all_boxes) >= MIN_BOXES_FOR_ROI_ESTIMATE:
+            _estimated_rois = estimate_rois(all_boxes, frames[0].shape)
+            print(f"Estimated play-area regions: {_estimated_rois}")
+    return all_boxes
+
+def detect_on_frames(frames, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Batched counterpart of detect_on_frame(frame, return_boxes=True).
+
+    Returns:
+        List[Tuple[image_with_detections, boxes]] in the same order as frames
+    """
+    all_boxes = detect_boxes_batch(frames, batch_size)
+    return [(draw_detections(frame.copy(), boxes), boxes) for frame, boxes in zip(frames, all_boxes)]
+
 def draw_detections(image, boxes):
-    for (cls_id, x, y, w, h) in boxes:
+    for (cls_id, x, y, w, h, *_) in boxes:
         cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
         cv2.putText(image, str(cls_id), (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
     return image
 
-def preprocess_video(video_path):
+def preprocess_video(video_path, batch_size=DEFAULT_BATCH_SIZE):
     results = []
     cap = cv2.VideoCapture(video_path)
+    frames = []
     while cap.isOpened():
         ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+        if frames and (not ret or len(frames) == batch_size):
+            results.extend(detect_on_frames(frames, batch_size))
+            frames = []
         if not ret:
             break
-        frame_with_boxes, boxes = detect_on_frame(frame, return_boxes=True)
-        results.append((frame_with_boxes, boxes))
     cap.release()
     return results
 
@@ -109,7 +412,7 @@ def detect_on_video_frame(video_path, frame_index):
 
     Returns:
         image_with_detections (np.array),
-        boxes (List[Tuple[name, x, y, w, h]])
+        boxes (List[Tuple[cls_id, x, y, w, h, conf]])
     """
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -139,7 +442,7 @@ def detect_on_image(image_path):
 
     Returns:
         image_with_detections (np.array),
-        boxes (List[Tuple[name, x, y, w, h]])
+        boxes (List[Tuple[cls_id, x, y, w, h, conf]])
     """
     if not os.path.exists(image_path):
         print(f"Image not found: {image_path}")
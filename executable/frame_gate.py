@@ -0,0 +1,87 @@
+# frame_gate.py
+
+import cv2
+import numpy as np
+import detector
+
+DEFAULT_CHANGE_THRESHOLD = 0.005
+
+class ChangeGate:
+    """
+    Cheap change detector: compares a small grayscale thumbnail of each frame
+    against the thumbnail of the last frame that was sent to the model.
+
+    A frame counts as changed when more than `threshold` of the thumbnail's
+    pixels differ by more than `pixel_delta` gray levels. Counting pixels
+    instead of averaging the difference keeps a single card entering the
+    table from being drowned out by the unchanged rest of the frame.
+    """
+
+    def __init__(self, threshold=DEFAULT_CHANGE_THRESHOLD, pixel_delta=15, size=(64, 36)):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.size = size
+        self._reference = None
+
+    def reset(self):
+        self._reference = None
+
+    def changed(self, frame):
+        """
+        Returns True if the frame should be inferred, and makes it the new reference.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        if self._reference is not None:
+            diff = cv2.absdiff(thumb, self._reference)
+            if np.count_nonzero(diff > self.pixel_delta) <= self.threshold * diff.size:
+                return False
+        self._reference = thumb
+        return True
+
+class GatedDetector:
+    """
+    Wraps a batch detector (detector.detect_boxes_batch by default, any
+    object with process_batch such as tracker.KeyframeTracker, or a function
+    of a list of frames returning their boxes) and reuses the
+    previous boxes for frames the ChangeGate considers unchanged.
+    """
+
+    def __init__(self, inner=None, gate=None):
+        self.inner = inner
+        self.gate = gate or ChangeGate()
+        self._stats = {"inferred_frames": 0, "skipped_frames": 0}
+        self._last_boxes = []
+
+    @property
+    def stats(self):
+        stats = dict(getattr(self.inner, "stats", {}))
+        stats.update(self._stats)
+        return stats
+
+    def process_batch(self, frames):
+        # Each frame points at the inferred frame whose boxes it will use;
+        # -1 means the last inferred frame of an earlier batch
+        plan = []
+        to_infer = []
+        for frame in frames:
+            if self.gate.changed(frame):
+                to_infer.append(frame)
+            else:
+                self._stats["skipped_frames"] += 1
+            plan.append(len(to_infer) - 1)
+
+        inferred = []
+        if to_infer:
+            if self.inner is None:
+                inferred = detector.detect_boxes_batch(to_infer, len(to_infer))
+            elif hasattr(self.inner, "process_batch"):
+                inferred = self.inner.process_batch(to_infer)
+            else:
+                inferred = self.inner(to_infer)
+        self._stats["inferred_frames"] += len(to_infer)
+
+        all_boxes = [inferred[i] if i >= 0 else self._last_boxes for i in plan]
+        if inferred:
+            self._last_boxes = inferred[-1]
+        return all_boxes
@@ -0,0 +1,214 @@
+# live.py
+#
+# Real-time detection on the newest available frame. The loop is independent
+# of Qt so it can run headless against VideoFileSource, e.g.:
+#
+#   python executable/live.py --replay match.mp4 --duration 30
+
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+import cv2
+import numpy as np
+import detector
+from frame_gate import ChangeGate, GatedDetector, DEFAULT_CHANGE_THRESHOLD
+
+class VideoFileSource:
+    """
+    Stand-in for screen_capture.CaptureSession that replays a video file in
+    real time on a background thread, with the same start/stop/latest()
+    interface and drop counting.
+    """
+
+    def __init__(self, video_path, loop=True):
+        self.video_path = video_path
+        self.loop = loop
+        self._cond = threading.Condition()
+        self._latest = None
+        self._latest_timestamp = None
+        self._seq = 0
+        self._read_seq = 0
+        self.grabbed = 0
+        self.dropped = 0
+        self.error = None
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="video-file-source", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            self.error = IOError(f"Failed to open video: {self.video_path}")
+        else:
+            interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30)
+            next_time = time.perf_counter()
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    if self.loop and self.grabbed:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    break
+                # Present each frame at its place on the video's timeline
+                next_time += interval
+                self._stop.wait(max(next_time - time.perf_counter(), 0))
+                with self._cond:
+                    if self._seq > self._read_seq:
+                        self.dropped += 1
+                    self._latest = frame
+                    self._latest_timestamp = time.perf_counter()
+                    self._seq += 1
+                    self.grabbed += 1
+                    self._cond.notify_all()
+            cap.release()
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def latest(self, timeout=1.0):
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > self._read_seq or self.finished, timeout=timeout)
+            if self._seq <= self._read_seq:
+                return None, None, None
+            self._read_seq = self._seq
+            return self._latest, self._latest_timestamp, self._seq
+
+class LiveStats:
+    """
+    Rolling live-mode statistics: achieved FPS over the last `window` seconds
+    and latency from capture to result over the last `samples` frames.
+    """
+
+    def __init__(self, window=2.0, samples=100):
+        self.window = window
+        self.frames = 0
+        self._completed = deque()
+        self._latencies = deque(maxlen=samples)
+
+    def add(self, capture_timestamp, done_timestamp):
+        self.frames += 1
+        self._latencies.append(done_timestamp - capture_timestamp)
+        self._completed.append(done_timestamp)
+        while self._completed and self._completed[0] < done_timestamp - self.window:
+            self._completed.popleft()
+
+    @property
+    def fps(self):
+        if len(self._completed) < 2:
+            return 0.0
+        span = self._completed[-1] - self._completed[0]
+        return (len(self._completed) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        latencies = np.array(self._latencies) * 1000.0 if self._latencies else np.zeros(1)
+        return {
+            "frames": self.frames,
+            "fps": self.fps,
+            "latency_ms": float(latencies[-1]),
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p95_ms": float(np.percentile(latencies, 95)),
+        }
+
+class LiveDetector:
+    """
+    Pulls the newest frame from a source (CaptureSession or VideoFileSource),
+    runs detection on it and reports (frame, boxes, capture_timestamp) through
+    on_result. Frames that arrive while inference runs are skipped by the
+    source, so results never fall behind the screen.
+
+    With a change_threshold (None disables it), frames the ChangeGate finds
+    unchanged reuse the previous boxes instead of running the model; counts
+    of both are in frame_counts().
+    """
+
+    def __init__(self, source, on_result=None, detect_batch=None, change_threshold=DEFAULT_CHANGE_THRESHOLD):
+        self.source = source
+        self.on_result = on_result
+        self.detect_batch = detect_batch or detector.detect_boxes_batch
+        self.gated = None
+        if change_threshold is not None:
+            self.gated = GatedDetector(self.detect_batch, ChangeGate(threshold=change_threshold))
+        self.stats = LiveStats()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, duration=None):
+        deadline = time.perf_counter() + duration if duration else None
+        while not self._stop.is_set():
+            if deadline and time.perf_counter() >= deadline:
+                break
+            frame, timestamp, _ = self.source.latest(timeout=0.5)
+            if frame is None:
+                if getattr(self.source, "error", None) is not None or getattr(self.source, "finished", False):
+                    break
+                continue
+
+            # The source may reuse its buffer once we ask for the next frame
+            frame = frame.copy()
+            if self.gated is not None:
+                boxes = self.gated.process_batch([frame])[0]
+            else:
+                boxes = self.detect_batch([frame])[0]
+            self.stats.add(timestamp, time.perf_counter())
+            if self.on_result:
+                self.on_result(frame, boxes, timestamp)
+        summary = self.stats.summary()
+        summary.update(self.frame_counts())
+        return summary
+
+    def frame_counts(self):
+        """
+        Returns {"inferred_frames", "skipped_frames"} so far.
+        """
+        if self.gated is None:
+            return {"inferred_frames": self.stats.frames, "skipped_frames": 0}
+        stats = self.gated.stats
+        return {"inferred_frames": stats["inferred_frames"], "skipped_frames": stats["skipped_frames"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless live detection on a replayed video")
+    parser.add_argument("--replay", required=True, help="video file played back in real time as the capture source")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--no-loop", action="store_true", help="stop at the end of the video")
+    parser.add_argument("--change-threshold", type=float, default=DEFAULT_CHANGE_THRESHOLD,
+                        help="fraction of changed pixels below which a frame reuses the previous boxes")
+    parser.add_argument("--no-skip-unchanged", dest="change_threshold", action="store_const", const=None,
+                        help="run the model on every frame")
+    args = parser.parse_args()
+
+    with VideoFileSource(args.replay, loop=not args.no_loop) as source:
+        live = LiveDetector(source, change_threshold=args.change_threshold)
+        summary = live.run(duration=args.duration)
+    summary["source_frames"] = source.grabbed
+    summary["dropped_frames"] = source.dropped
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
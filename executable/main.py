@@ -1,9 +1,38 @@
 import sys
+import time
+import argparse
+
+START_TIME = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
+import detector
 from ui_main import MainWindow
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Pokémon TCG card detector")
+    detector.add_arguments(parser)
+    parser.add_argument("--live-source", metavar="VIDEO",
+                        help="replay this video instead of capturing the screen in live mode")
+    parser.add_argument("--timing", action="store_true",
+                        help="print when the window is shown and the model is ready, in seconds since start")
+    # Unknown arguments are left for Qt
+    return parser.parse_known_args(argv)
+
+def print_model_ready(future):
+    if future.exception() is None:
+        print(f"Model ({detector.BACKEND}) loaded and warmed up {time.perf_counter() - START_TIME:.2f}s after start")
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    args, qt_argv = parse_args(sys.argv[1:])
+    detector.configure(args)
+
+    # Start loading the model before building the UI so both happen at once
+    model_future = detector.load_model_async()
+    if args.timing:
+        model_future.add_done_callback(print_model_ready)
+    app = QApplication(sys.argv[:1] + qt_argv)
+    window = MainWindow(live_source=args.live_source)
     window.show()
+    if args.timing:
+        print(f"Window shown {time.perf_counter() - START_TIME:.2f}s after start")
     sys.exit(app.exec_())
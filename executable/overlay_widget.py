@@ -4,24 +4,37 @@ from PyQt5.QtWidgets import QDialog, QLabel, QHBoxLayout
 from PyQt5.QtGui import QPixmap
 import os
 import random
+from functools import lru_cache
+from card_atlas import load_atlas
+from card_cache import atlas_qimage
 
 CARDS_DIR = "cards"
 
+@lru_cache(maxsize=1)
+def list_card_images():
+    # The cards directory does not change while the app runs; list it once
+    return tuple(img for img in os.listdir(CARDS_DIR) if img.lower().endswith(('.jpg', '.png')))
+
 class ZoomDialog(QDialog):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Card Viewer")
 
-        # Choose a random image from the cards directory
-        images = [img for img in os.listdir(CARDS_DIR) if img.lower().endswith(('.jpg', '.png'))]
-        if not images:
-            raise FileNotFoundError("No images found in 'cards' folder.")
-        
-        card_path = os.path.join(CARDS_DIR, random.choice(images))
-
         layout = QHBoxLayout()
         label = QLabel()
-        pixmap = QPixmap(card_path).scaled(300, 450)
+        pixmap = self.random_card_pixmap().scaled(300, 450)
         label.setPixmap(pixmap)
         layout.addWidget(label)
         self.setLayout(layout)
+
+    def random_card_pixmap(self):
+        atlas = load_atlas()
+        if atlas is not None and len(atlas):
+            _, card = atlas.random_image(originals_only=True)
+            return QPixmap.fromImage(atlas_qimage(card).copy())
+
+        # Choose a random image from the cards directory
+        images = list_card_images()
+        if not images:
+            raise FileNotFoundError("No images found in 'cards' folder.")
+        return QPixmap(os.path.join(CARDS_DIR, random.choice(images)))
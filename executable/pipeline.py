@@ -0,0 +1,212 @@
+# pipeline.py
+
+import queue
+import threading
+import time
+import cv2
+import os
+import detector
+from results_store import ResultsWriter, DetectionResults, write_source_reference
+import appearance_index
+from seek_index import SeekIndexWriter
+
+_END = object()
+
+class VideoPipeline:
+    """
+    Offline video processing split into three stages connected by bounded queues:
+    a decoder thread, inference on the calling thread, and a writer thread that
+    encodes the annotated video and stores the detection results (see results_store). Each stage runs on a
+    single thread, so frame order is kept, and a full queue blocks the stage
+    feeding it, so at most queue_size batches wait between two stages.
+
+    With output_path=None no video is encoded: only the detections and a
+    reference to the source video are saved, and boxes are drawn at playback.
+    export_annotated_video() can produce the annotated video later.
+    """
+
+    def __init__(self, video_path, output_path, result_path, fps,
+                 batch_size=detector.DEFAULT_BATCH_SIZE, queue_size=4, progress_callback=None,
+                 frame_detector=None):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.result_path = result_path
+        self.fps = fps
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.progress_callback = progress_callback
+        # Optional stateful detector (e.g. tracker.KeyframeTracker) with a
+        # process_batch(frames) -> boxes per frame method
+        self.frame_detector = frame_detector
+
+        self.frame_count = 0
+        self.stats = {"frames": 0, "elapsed": 0.0}
+        self._stop = threading.Event()
+        self._errors = []
+
+    def run(self):
+        """
+        Processes the whole video. Returns False if the video cannot be opened
+        and re-raises the first error hit by any stage.
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            print(f"Failed to open video: {self.video_path}")
+            return False
+
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        if self.output_path is not None:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(self.output_path, fourcc, self.fps, (width, height))
+            self.seek_index = SeekIndexWriter(self.output_path, self.frame_count)
+        else:
+            out = None
+            # Seek in the source video itself; its index is kept with the results
+            self.seek_index = SeekIndexWriter(self.video_path, self.frame_count,
+                                              index_base=os.path.splitext(self.result_path)[0])
+
+        # Play-area regions estimated for a previous video do not apply to this one
+        detector.reset_estimated_rois()
+
+        decode_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+
+        start = time.perf_counter()
+        decoder = threading.Thread(target=self._decode, args=(cap, decode_queue), daemon=True)
+        writer = threading.Thread(target=self._write, args=(out, write_queue), daemon=True)
+        decoder.start()
+        writer.start()
+
+        try:
+            self._infer(decode_queue, write_queue)
+        finally:
+            decoder.join()
+            writer.join()
+            cap.release()
+            if out is not None:
+                out.release()
+            self.stats["elapsed"] = time.perf_counter() - start
+            if self.frame_detector is not None:
+                self.stats.update(getattr(self.frame_detector, "stats", {}))
+
+        if self._errors:
+            raise self._errors[0]
+        # Needs the finished file to find its keyframes
+        self.seek_index.finish()
+        write_source_reference(self.result_path, self.video_path, self.fps, self.stats["frames"])
+        appearance_index.build_index(DetectionResults(self.result_path))
+        return True
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _END
+
+    def _decode(self, cap, out_queue):
+        try:
+            frames = []
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+                if len(frames) == self.batch_size:
+                    if not self._put(out_queue, frames):
+                        return
+                    frames = []
+            if frames:
+                self._put(out_queue, frames)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_queue, _END)
+
+    def _infer(self, in_queue, out_queue):
+        try:
+            while True:
+                frames = self._get(in_queue)
+                if frames is _END:
+                    break
+                if self.frame_detector is not None:
+                    all_boxes = self.frame_detector.process_batch(frames)
+                else:
+                    all_boxes = detector.detect_boxes_batch(frames, self.batch_size)
+                if not self._put(out_queue, (frames, all_boxes)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_queue, _END)
+
+    def _write(self, out, in_queue):
+        try:
+            with ResultsWriter(self.result_path) as results:
+                while True:
+                    item = self._get(in_queue)
+                    if item is _END:
+                        break
+                    frames, all_boxes = item
+                    for frame, boxes in zip(frames, all_boxes):
+                        if out is not None:
+                            # The decoded frame is not used after this stage, so draw on it in place
+                            out.write(detector.draw_detections(frame, boxes))
+                        self.seek_index.add_frame(self.stats["frames"], frame)
+                        results.append(self.stats["frames"], boxes)
+                        self.stats["frames"] += 1
+
+                        if self.progress_callback and self.frame_count:
+                            self.progress_callback(int((self.stats["frames"] / self.frame_count) * 100))
+        except Exception as e:
+            self._fail(e)
+
+def export_annotated_video(video_path, detection_results, output_path, fps=None, progress_callback=None):
+    """
+    Encodes video_path with the stored detections drawn in, as processing does
+    when it is given an output path. Returns False if the video cannot be opened.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Failed to open video: {video_path}")
+        return False
+
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    seek_index = SeekIndexWriter(output_path, frame_count)
+
+    frame_index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(detector.draw_detections(frame, detection_results.get(frame_index, [])))
+            seek_index.add_frame(frame_index, frame)
+            frame_index += 1
+            if progress_callback and frame_count:
+                progress_callback(int((frame_index / frame_count) * 100))
+    finally:
+        cap.release()
+        out.release()
+    seek_index.finish()
+    return True
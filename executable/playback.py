@@ -0,0 +1,151 @@
+# playback.py
+
+import threading
+from collections import deque
+import cv2
+from PyQt5.QtGui import QImage
+import detector
+
+class PlaybackBuffer:
+    """
+    Decodes a processed video on a background thread, draws its detections
+    and keeps up to `size` ready-to-display QImages ahead of the playhead.
+
+    The GUI asks for the frame that is due with take(frame_index); frames
+    older than that are discarded and counted in `dropped`, and a due frame
+    that has not been decoded yet is counted in `late`.
+
+    With annotate=True the boxes and class ids are drawn as in an exported
+    annotated video, for playing the unannotated source video; otherwise the
+    boxes are drawn as plain box_color rectangles.
+    """
+
+    def __init__(self, video_path, detection_results, size=16, box_color=(0, 0, 255), seek_index=None,
+                 annotate=False):
+        self.video_path = video_path
+        self.detection_results = detection_results
+        self.seek_index = seek_index
+        self.annotate = annotate
+        self.size = size
+        self.box_color = box_color
+
+        self.dropped = 0
+        self.late = 0
+        self.ended = False
+
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self._seek_to = 0
+        self._generation = 0
+        self._last_late = None
+        self._last_taken = -1
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, start_frame=0):
+        self._seek_to = start_frame
+        self._last_taken = start_frame - 1
+        self._thread = threading.Thread(target=self._run, name="playback-decoder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def seek(self, frame_index):
+        with self._cond:
+            self._seek_to = frame_index
+            self._generation += 1
+            self._frames.clear()
+            self._last_taken = frame_index - 1
+            self.ended = False
+            self._cond.notify_all()
+
+    def finished(self):
+        # The decoder reached the end of the video and every frame was handed out
+        with self._cond:
+            return self.ended and not self._frames
+
+    def take(self, frame_index):
+        """
+        Returns (index, QImage) of the newest decoded frame at or before
+        frame_index, or None if it has not been decoded yet.
+        """
+        with self._cond:
+            found = None
+            while self._frames and self._frames[0][0] <= frame_index:
+                if found is not None:
+                    self.dropped += 1
+                found = self._frames.popleft()
+            if found is not None:
+                self._last_taken = found[0]
+            elif frame_index > self._last_taken and not self.ended and self._last_late != frame_index:
+                # A new frame is due but the decoder has not produced it yet
+                self.late += 1
+                self._last_late = frame_index
+            self._cond.notify_all()
+            return found
+
+    def _render(self, frame, frame_index):
+        boxes = self.detection_results.get(frame_index, [])
+        if self.annotate:
+            detector.draw_detections(frame, boxes)
+        else:
+            for (_, x, y, w, h, *_) in boxes:
+                cv2.rectangle(frame, (x, y), (x + w, y + h), self.box_color, 2)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        # copy() so the image owns its pixels once rgb goes out of scope
+        return QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888).copy()
+
+    def _seek(self, cap, position):
+        if self.seek_index is None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+            return
+        # Land exactly on a keyframe, then step forward without converting frames
+        keyframe = self.seek_index.keyframe_at_or_before(position)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        for _ in range(position - keyframe):
+            if self._stop.is_set() or not cap.grab():
+                break
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        generation = None
+        position = 0
+        seek_to_position = False
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stop.is_set() or self._generation != generation
+                    or (len(self._frames) < self.size and not self.ended)
+                )
+                if self._stop.is_set():
+                    break
+                if self._generation != generation:
+                    generation = self._generation
+                    position = self._seek_to
+                    seek_to_position = True
+
+            if seek_to_position:
+                seek_to_position = False
+                self._seek(cap, position)
+
+            ret, frame = cap.read()
+            if not ret:
+                with self._cond:
+                    if self._generation == generation:
+                        self.ended = True
+                continue
+
+            image = self._render(frame, position)
+            with self._cond:
+                # A seek while decoding makes this frame stale
+                if self._generation == generation:
+                    self._frames.append((position, image))
+            position += 1
+        cap.release()
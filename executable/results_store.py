@@ -0,0 +1,260 @@
+# results_store.py
+#
+# Binary, columnar store for per-frame detection results.
+#
+# A results file is a plain concatenation of .npy arrays, in this order:
+#   header   int64[2]   (FORMAT_VERSION, number of frames)
+#   offsets  int64[n+1] boxes of frame i are rows offsets[i]:offsets[i + 1]
+#   frame_id int32[m]
+#   cls      int16[m]
+#   x, y, w, h int32[m]
+#   conf     float32[m] (NaN when unknown, e.g. converted from the text format)
+#
+# Every array is memory-mapped on load, so opening a file is O(1) and reading
+# one frame's boxes only touches that frame's rows.
+#
+# A results_N.source.json file next to it records the video the detections
+# were made on, so they can be drawn over the original frames at playback.
+
+import os
+import sys
+import json
+from array import array
+import numpy as np
+
+FORMAT_VERSION = 1
+RESULTS_EXTENSION = ".dets"
+
+COLUMNS = (
+    ("frame_id", np.int32),
+    ("cls", np.int16),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("w", np.int32),
+    ("h", np.int32),
+    ("conf", np.float32),
+)
+
+# Rows buffered per chunk by ResultsWriter (28 bytes each)
+CHUNK_ROWS = 65536
+
+class ResultsWriter:
+    """
+    Collects boxes frame by frame and writes the results file on close().
+    Frames must be appended in increasing order; skipped frames are stored
+    with no detections. The file is written to a temporary path and renamed,
+    so readers never see a partial file.
+
+    Rows are buffered in fixed-size numpy chunks and per-frame counts in a C
+    array, so memory grows by a few dozen bytes per box rather than by a
+    Python tuple per box.
+    """
+
+    _ROW_DTYPE = np.dtype(list(COLUMNS))
+
+    def __init__(self, path):
+        self.path = path
+        self._chunks = []
+        self._chunk = np.empty(CHUNK_ROWS, dtype=self._ROW_DTYPE)
+        self._chunk_rows = 0
+        self._counts = array('i')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    @property
+    def frame_count(self):
+        return len(self._counts)
+
+    def append(self, frame_index, boxes):
+        if frame_index < len(self._counts):
+            raise ValueError(f"Frame {frame_index} already written (next frame is {len(self._counts)})")
+        if len(self._counts) < frame_index:
+            # Frames with no call to append() have no detections
+            self._counts.frombytes(bytes(self._counts.itemsize * (frame_index - len(self._counts))))
+
+        self._counts.append(len(boxes))
+        if not boxes:
+            return
+        rows = [(frame_index, *box[:6]) if len(box) > 5 else (frame_index, *box[:5], np.nan) for box in boxes]
+        if self._chunk_rows + len(rows) > len(self._chunk):
+            self._chunks.append(self._chunk[:self._chunk_rows])
+            self._chunk = np.empty(max(CHUNK_ROWS, len(rows)), dtype=self._ROW_DTYPE)
+            self._chunk_rows = 0
+        self._chunk[self._chunk_rows:self._chunk_rows + len(rows)] = rows
+        self._chunk_rows += len(rows)
+
+    def close(self):
+        rows = np.concatenate(self._chunks + [self._chunk[:self._chunk_rows]])
+        self._chunks = []
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._counts, dtype=np.int32), out=offsets[1:])
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as fh:
+            np.lib.format.write_array(fh, np.array([FORMAT_VERSION, len(self._counts)], dtype=np.int64))
+            np.lib.format.write_array(fh, offsets)
+            for name, _ in COLUMNS:
+                np.lib.format.write_array(fh, np.ascontiguousarray(rows[name]))
+        os.replace(tmp_path, self.path)
+
+def read_next_array(fh, path):
+    """
+    Memory-maps the .npy array starting at the current position of fh, a file
+    of concatenated arrays, and moves fh past it.
+    """
+    version = np.lib.format.read_magic(fh)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+
+    offset = fh.tell()
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    fh.seek(offset + nbytes)
+    if nbytes == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+class DetectionResults:
+    """
+    Read-only, memory-mapped view of a results file.
+
+    get() mirrors the dict returned by detector.load_detection_results, so it
+    can be used as a drop-in replacement during playback.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            header = read_next_array(fh, path)
+            if int(header[0]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported results format version {int(header[0])} in {path}")
+            self.offsets = read_next_array(fh, path)
+            for name, _ in COLUMNS:
+                setattr(self, name, read_next_array(fh, path))
+        self.frame_count = int(header[1])
+
+    def __len__(self):
+        return self.frame_count
+
+    def __contains__(self, frame_index):
+        return 0 <= frame_index < self.frame_count
+
+    def frame_slice(self, frame_index):
+        return slice(int(self.offsets[frame_index]), int(self.offsets[frame_index + 1]))
+
+    def classes_between(self, start, stop):
+        """
+        Returns the distinct class ids detected in frames [start, stop).
+        """
+        start = max(start, 0)
+        stop = min(stop, self.frame_count)
+        if start >= stop:
+            return []
+        return np.unique(self.cls[int(self.offsets[start]):int(self.offsets[stop])]).tolist()
+
+    def get(self, frame_index, default=None):
+        """
+        Returns the boxes of one frame as a list of (cls_id, x, y, w, h).
+        """
+        if frame_index not in self:
+            return default
+        s = self.frame_slice(frame_index)
+        return list(zip(
+            self.cls[s].tolist(), self.x[s].tolist(), self.y[s].tolist(),
+            self.w[s].tolist(), self.h[s].tolist()
+        ))
+
+    def hit_test(self, frame_index, px, py):
+        """
+        Returns the class of the first box of the frame containing (px, py), or None.
+        """
+        if frame_index not in self:
+            return None
+        s = self.frame_slice(frame_index)
+        x, y = self.x[s], self.y[s]
+        hits = (x <= px) & (px < x + self.w[s]) & (y <= py) & (py < y + self.h[s])
+        found = np.flatnonzero(hits)
+        if found.size == 0:
+            return None
+        return int(self.cls[s][found[0]])
+
+def iter_text_results(txt_path):
+    """
+    Streams a results_N.txt file, yielding (frame_index, boxes) per frame.
+    """
+    current_frame = None
+    boxes = []
+    with open(txt_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("Frame"):
+                if current_frame is not None:
+                    yield current_frame, boxes
+                parts = line.split(":")
+                current_frame = int(parts[0].split()[1])
+                boxes = []
+            elif current_frame is not None and ',' in line:
+                parts = line.split(",")
+                if len(parts) == 5:
+                    name, x, y, w, h = parts
+                    boxes.append((int(name), int(x), int(y), int(w), int(h)))
+    if current_frame is not None:
+        yield current_frame, boxes
+
+def convert_text_results(txt_path, store_path=None):
+    """
+    Converts a results_N.txt file into the binary format. Returns the new path.
+    """
+    if store_path is None:
+        store_path = os.path.splitext(txt_path)[0] + RESULTS_EXTENSION
+    with ResultsWriter(store_path) as writer:
+        for frame_index, boxes in iter_text_results(txt_path):
+            writer.append(frame_index, boxes)
+    return store_path
+
+def source_reference_path(result_path):
+    return os.path.splitext(result_path)[0] + ".source.json"
+
+def write_source_reference(result_path, video_path, fps, frame_count):
+    with open(source_reference_path(result_path), 'w') as f:
+        json.dump({"video": os.path.abspath(video_path), "fps": fps, "frame_count": frame_count}, f)
+
+def read_source_reference(result_path):
+    """
+    Returns the {"video", "fps", "frame_count"} dict saved with the results, or
+    None if there is none (runs processed before it existed).
+    """
+    path = source_reference_path(result_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_results(path):
+    """
+    Opens a results file for random access. Text results are converted once to
+    a sibling binary file, which is reused as long as it is newer than the text.
+    """
+    if path.endswith(".txt"):
+        store_path = os.path.splitext(path)[0] + RESULTS_EXTENSION
+        if not os.path.exists(store_path) or os.path.getmtime(store_path) < os.path.getmtime(path):
+            convert_text_results(path, store_path)
+        path = store_path
+    return DetectionResults(path)
+
+if __name__ == "__main__":
+    # Usage: python executable/results_store.py [results/*.txt ...]
+    # Without arguments, converts the text results of the runs in the catalog
+    from run_catalog import RunCatalog
+    paths = sys.argv[1:] or [run["results_path"] for run in RunCatalog().list_runs()
+                             if run["results_path"].endswith(".txt")]
+    for txt_path in paths:
+        store_path = convert_text_results(txt_path)
+        results = DetectionResults(store_path)
+        print(f"{txt_path} -> {store_path} ({len(results)} frames, {len(results.cls)} boxes)")
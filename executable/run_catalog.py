@@ -0,0 +1,194 @@
+# run_catalog.py
+#
+# SQLite catalog of processing runs, stored in results/catalog.sqlite3.
+#
+# Each run of VideoPipeline gets a row when it starts; its id is the N of
+# results_N.dets / output_N.mp4. Ids come from an AUTOINCREMENT key inside a
+# write transaction, so processes running at the same time never get the same
+# index. Runs processed before the catalog existed are imported from the file
+# names in results/ when the catalog is first created; those with neither an
+# output video nor a source video to play are imported as orphaned.
+#
+#   python executable/run_catalog.py      lists the runs
+
+import os
+import json
+import time
+import sqlite3
+
+import results_store
+
+RESULTS_DIR = "results"
+CATALOG_NAME = "catalog.sqlite3"
+# 2: imported runs without a video are orphaned instead of done
+SCHEMA_VERSION = 2
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_ORPHANED = "orphaned"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL,
+    source_video TEXT,
+    results_path TEXT NOT NULL,
+    output_video TEXT,
+    settings TEXT NOT NULL DEFAULT '{}',
+    stats TEXT NOT NULL DEFAULT '{}',
+    frame_count INTEGER,
+    elapsed REAL,
+    fps REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+class RunCatalog:
+    """
+    Opens a short-lived connection per call, so one catalog object can be
+    shared between the GUI and worker threads.
+    """
+
+    def __init__(self, results_dir=RESULTS_DIR):
+        self.results_dir = results_dir
+        self.path = os.path.join(results_dir, CATALOG_NAME)
+        os.makedirs(results_dir, exist_ok=True)
+        with self._connect() as db:
+            # WAL lets the UI read while a worker is writing
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("BEGIN IMMEDIATE")
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0:
+                db.execute(_SCHEMA)
+                self._import_existing_runs(db)
+            if version < 2:
+                self._mark_orphaned_runs(db)
+            if version < SCHEMA_VERSION:
+                db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Connection(db)
+
+    def create_run(self, source_video, settings=None, annotated=True):
+        """
+        Allocates the next run index and records the run as running. Returns
+        the run as a dict, with the artifact paths the run should write to.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            run_id = db.execute(
+                "INSERT INTO runs (status, source_video, results_path, settings, created_at) "
+                "VALUES (?, ?, '', ?, ?)",
+                (STATUS_RUNNING, os.path.abspath(source_video), json.dumps(settings or {}, default=str), time.time())
+            ).lastrowid
+            results_path = os.path.join(self.results_dir, f"results_{run_id}{results_store.RESULTS_EXTENSION}")
+            output_video = os.path.join(self.results_dir, f"output_{run_id}.mp4") if annotated else None
+            db.execute("UPDATE runs SET results_path = ?, output_video = ? WHERE id = ?",
+                       (results_path, output_video, run_id))
+        return self.get_run(run_id)
+
+    def finish_run(self, run_id, stats):
+        frames = stats.get("frames", 0)
+        elapsed = stats.get("elapsed", 0.0)
+        with self._connect() as db:
+            db.execute(
+                "UPDATE runs SET status = ?, stats = ?, frame_count = ?, elapsed = ?, fps = ?, finished_at = ? "
+                "WHERE id = ?",
+                (STATUS_DONE, json.dumps(stats, default=str), frames, elapsed,
+                 frames / elapsed if elapsed else None, time.time(), run_id)
+            )
+
+    def fail_run(self, run_id, error):
+        with self._connect() as db:
+            db.execute("UPDATE runs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                       (STATUS_FAILED, str(error), time.time(), run_id))
+
+    def set_output_video(self, run_id, output_video):
+        with self._connect() as db:
+            db.execute("UPDATE runs SET output_video = ? WHERE id = ?", (output_video, run_id))
+
+    def get_run(self, run_id):
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        return _row_to_run(row) if row is not None else None
+
+    def list_runs(self, status=STATUS_DONE):
+        """
+        Returns the runs with the given status (all runs for None), oldest first.
+        """
+        with self._connect() as db:
+            if status is None:
+                rows = db.execute("SELECT * FROM runs ORDER BY id").fetchall()
+            else:
+                rows = db.execute("SELECT * FROM runs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [_row_to_run(row) for row in rows]
+
+    def playable_runs(self):
+        """
+        Returns the finished runs whose output or source video is still on disk.
+        """
+        return [run for run in self.list_runs() if is_playable(run)]
+
+    def _mark_orphaned_runs(self, db):
+        # Only imported runs can lack both; create_run always records a source
+        db.execute("UPDATE runs SET status = ? WHERE status = ? AND source_video IS NULL AND output_video IS NULL",
+                   (STATUS_ORPHANED, STATUS_DONE))
+
+    def _import_existing_runs(self, db):
+        indices = set()
+        for name in os.listdir(self.results_dir):
+            if name.startswith("output_") or name.startswith("results_"):
+                index = name.split('_')[1].split('.')[0]
+                if index.isdigit():
+                    indices.add(int(index))
+        for index in sorted(indices):
+            results_path = os.path.join(self.results_dir, f"results_{index}{results_store.RESULTS_EXTENSION}")
+            legacy_path = os.path.join(self.results_dir, f"results_{index}.txt")
+            if not os.path.exists(results_path) and os.path.exists(legacy_path):
+                results_path = legacy_path
+            output_video = os.path.join(self.results_dir, f"output_{index}.mp4")
+            source = results_store.read_source_reference(results_path)
+            db.execute(
+                "INSERT INTO runs (id, status, source_video, results_path, output_video, frame_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (index, STATUS_DONE, source["video"] if source else None, results_path,
+                 output_video if os.path.exists(output_video) else None,
+                 source["frame_count"] if source else None,
+                 os.path.getmtime(results_path) if os.path.exists(results_path) else time.time())
+            )
+
+class _Connection:
+    # sqlite3's own context manager commits but does not close the connection
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.db.in_transaction:
+                self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.db.close()
+
+def is_playable(run):
+    return any(path and os.path.exists(path) for path in (run["output_video"], run["source_video"]))
+
+def _row_to_run(row):
+    run = dict(row)
+    run["settings"] = json.loads(run["settings"])
+    run["stats"] = json.loads(run["stats"])
+    return run
+
+if __name__ == "__main__":
+    for run in RunCatalog().list_runs(status=None):
+        frames = f"{run['frame_count']} frames" if run["frame_count"] else ""
+        fps = f"{run['fps']:.1f} FPS" if run["fps"] else ""
+        artifact = run["output_video"] or run["source_video"] or ""
+        print(f"{run['id']:>4}  {run['status']:<8} {frames:>14} {fps:>10}  {artifact}")
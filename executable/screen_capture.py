@@ -5,14 +5,23 @@ import numpy as np
 import cv2
 import pygetwindow as gw
 import time
+import threading
 
 CAPTURE_REGION = None
 OVERLAY_WINDOW_TITLE = "PTCG Overlay"  # must match self.setWindowTitle
 
+# mss handles are bound to the thread that created them; reuse one per thread
+_thread_local = threading.local()
+
 def set_capture_region(region_dict):
     global CAPTURE_REGION
     CAPTURE_REGION = region_dict
 
+def _get_mss():
+    if not hasattr(_thread_local, "sct"):
+        _thread_local.sct = mss.mss()
+    return _thread_local.sct
+
 def get_video_frame(hide_window=False):
     global CAPTURE_REGION
     if CAPTURE_REGION is None:
@@ -36,10 +45,9 @@ def get_video_frame(hide_window=False):
                     moved = True
                     time.sleep(0.05)
 
-        with mss.mss() as sct:
-            screenshot = sct.grab(CAPTURE_REGION)
-            frame = np.array(screenshot)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+        screenshot = _get_mss().grab(CAPTURE_REGION)
+        frame = np.array(screenshot)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
 
         if moved and original_position:
             overlay_win.moveTo(*original_position)
@@ -50,3 +58,122 @@ def get_video_frame(hide_window=False):
         print(f"Capture error: {e}")
         return None
 
+class CaptureSession:
+    """
+    Long-lived capture of a screen region. A background thread owns a single
+    mss handle, grabs continuously (at most max_fps) and converts each grab
+    into one of `ring_size` preallocated buffers, so live mode never pays for
+    capture setup or new allocations. The buffers are sized from the region
+    and reallocated once if the grabs come back at another size (scaled
+    displays).
+
+    latest() hands out the newest frame with its capture timestamp
+    (time.perf_counter). Frames replaced before anyone read them are counted
+    in `dropped`. The returned array stays valid until the next latest()
+    call, so the session supports a single consumer.
+
+    Unlike get_video_frame(hide_window=True) the overlay is not moved out of
+    the way, so it should be kept outside the capture region.
+    """
+
+    def __init__(self, region=None, ring_size=3, max_fps=60, color_conversion=cv2.COLOR_BGRA2BGR):
+        self.region = dict(region or CAPTURE_REGION)
+        self.max_fps = max_fps
+        self.color_conversion = color_conversion
+        self._buffers = [np.empty((self.region["height"], self.region["width"], 3), dtype=np.uint8)
+                         for _ in range(max(ring_size, 3))]
+
+        self._cond = threading.Condition()
+        self._latest_slot = None
+        self._reading_slot = None
+        self._latest_timestamp = None
+        self._seq = 0
+        self._read_seq = 0
+        self.grabbed = 0
+        self.dropped = 0
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="capture-session", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _free_slot(self):
+        for slot in range(len(self._buffers)):
+            if slot != self._latest_slot and slot != self._reading_slot:
+                return slot
+
+    def _run(self):
+        interval = 1.0 / self.max_fps if self.max_fps else 0.0
+        try:
+            with mss.mss() as sct:
+                while not self._stop.is_set():
+                    started = time.perf_counter()
+                    shot = sct.grab(self.region)
+                    timestamp = time.perf_counter()
+                    bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+                    with self._cond:
+                        slot = self._free_slot()
+                    # The slot is neither published nor being read, so convert outside the lock.
+                    # On scaled (HiDPI) displays the grab is larger than the region: the slot
+                    # then gets a buffer of the grab's size, kept for the following grabs
+                    buffer = self._buffers[slot]
+                    if buffer.shape[:2] != bgra.shape[:2]:
+                        buffer = None
+                    self._buffers[slot] = cv2.cvtColor(bgra, self.color_conversion, dst=buffer)
+
+                    with self._cond:
+                        if self._seq > self._read_seq:
+                            self.dropped += 1
+                        self._latest_slot = slot
+                        self._latest_timestamp = timestamp
+                        self._seq += 1
+                        self.grabbed += 1
+                        self._cond.notify_all()
+
+                    remaining = interval - (time.perf_counter() - started)
+                    if remaining > 0:
+                        self._stop.wait(remaining)
+        except Exception as e:
+            print(f"Capture error: {e}")
+            self.error = e
+            with self._cond:
+                self._cond.notify_all()
+
+    def latest(self, timeout=1.0):
+        """
+        Waits up to `timeout` seconds for a frame newer than the last one returned.
+
+        Returns:
+            frame (np.array), capture timestamp, sequence number; or (None, None, None)
+        """
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._seq > self._read_seq or self._stop.is_set() or self.error is not None,
+                timeout=timeout
+            )
+            if not ready or self._seq <= self._read_seq:
+                return None, None, None
+            self._reading_slot = self._latest_slot
+            self._read_seq = self._seq
+            return self._buffers[self._reading_slot], self._latest_timestamp, self._seq
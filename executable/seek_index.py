@@ -0,0 +1,109 @@
+# seek_index.py
+#
+# Keyframe index and thumbnail strip stored next to a processed video:
+#   output_N.seek.json    keyframe positions and thumbnail layout
+#   output_N.thumbs.npy   (count, h, w, 3) BGR thumbnails, memory-mapped on load
+# For a source video played with overlays the files are named after the
+# results instead (results_N.seek.json), since the video lives elsewhere.
+#
+# OpenCV's FFmpeg writer encodes mp4v with a fixed 12-frame GOP, so keyframes
+# are already close together; the index records where they actually are by
+# scanning the packets of the finished file, which needs no decoding.
+
+import os
+import json
+import math
+from bisect import bisect_right
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = (96, 54)
+# Enough previews for a slider a couple thousand pixels wide, whatever the video length
+MAX_THUMBNAILS = 2000
+
+def index_paths(video_path, index_base=None):
+    base = index_base or os.path.splitext(video_path)[0]
+    return base + ".seek.json", base + ".thumbs.npy"
+
+def scan_keyframes(video_path):
+    """
+    Lists the frame numbers of the video's keyframes by reading packets
+    without decoding them. Returns None if the backend cannot do that.
+    """
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        cap.release()
+        return None
+    keyframes = []
+    frame_index = 0
+    while cap.grab():
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            keyframes.append(frame_index)
+        frame_index += 1
+    cap.release()
+    return keyframes
+
+class SeekIndexWriter:
+    """
+    Collects a thumbnail every `stride` frames while a video is written;
+    finish() scans the keyframes of the closed file and saves the index.
+    """
+
+    def __init__(self, video_path, expected_frames, index_base=None):
+        self.video_path = video_path
+        self.index_base = index_base
+        self.stride = max(1, math.ceil(expected_frames / MAX_THUMBNAILS)) if expected_frames > 0 else 1
+        self._thumbnails = []
+        self.frame_count = 0
+
+    def add_frame(self, frame_index, frame):
+        if frame_index % self.stride == 0:
+            self._thumbnails.append(cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA))
+        self.frame_count = frame_index + 1
+
+    def finish(self):
+        json_path, thumbs_path = index_paths(self.video_path, self.index_base)
+        thumbnails = np.stack(self._thumbnails) if self._thumbnails else \
+            np.zeros((0, THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0], 3), dtype=np.uint8)
+        np.save(thumbs_path, thumbnails)
+        with open(json_path, 'w') as f:
+            json.dump({
+                "frame_count": self.frame_count,
+                "keyframes": scan_keyframes(self.video_path),
+                "thumbnail_stride": self.stride,
+                "thumbnail_size": list(THUMBNAIL_SIZE),
+            }, f)
+
+class SeekIndex:
+    def __init__(self, keyframes, thumbnails=None, thumbnail_stride=1):
+        self.keyframes = keyframes or [0]
+        self.thumbnails = thumbnails
+        self.thumbnail_stride = thumbnail_stride
+
+    @classmethod
+    def load(cls, video_path, index_base=None):
+        """
+        Loads the index saved next to the video. Videos processed before the
+        index existed get their keyframes scanned now, without thumbnails.
+        """
+        json_path, thumbs_path = index_paths(video_path, index_base)
+        if not os.path.exists(json_path):
+            return cls(scan_keyframes(video_path))
+        with open(json_path) as f:
+            meta = json.load(f)
+        thumbnails = np.load(thumbs_path, mmap_mode='r') if os.path.exists(thumbs_path) else None
+        keyframes = meta.get("keyframes") or scan_keyframes(video_path)
+        return cls(keyframes, thumbnails, meta.get("thumbnail_stride", 1))
+
+    def keyframe_at_or_before(self, frame_index):
+        i = bisect_right(self.keyframes, frame_index) - 1
+        return self.keyframes[max(i, 0)]
+
+    def thumbnail(self, frame_index):
+        """
+        Returns the BGR thumbnail closest to frame_index, or None.
+        """
+        if self.thumbnails is None or len(self.thumbnails) == 0:
+            return None
+        i = min(int(round(frame_index / self.thumbnail_stride)), len(self.thumbnails) - 1)
+        return np.asarray(self.thumbnails[i])
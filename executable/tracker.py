@@ -0,0 +1,111 @@
+# tracker.py
+
+import cv2
+import numpy as np
+import detector
+
+DEFAULT_KEYFRAME_INTERVAL = 30
+
+class KeyframeTracker:
+    """
+    Runs the detector only on keyframes and carries boxes forward in between
+    with sparse Lucas-Kanade optical flow.
+
+    A new keyframe is taken every keyframe_interval frames, or earlier as soon
+    as any track's confidence (the share of its feature points that survive a
+    forward-backward flow check) drops below min_confidence. Every frame gets
+    a list of boxes, so the results keep one entry per frame.
+    """
+
+    def __init__(self, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, min_confidence=0.6,
+                 max_points=20, scale=0.5, detect_batch=None):
+        self.keyframe_interval = keyframe_interval
+        self.min_confidence = min_confidence
+        self.max_points = max_points
+        self.scale = scale
+        self.detect_batch = detect_batch or detector.detect_boxes_batch
+
+        self.stats = {"keyframes": 0, "tracked_frames": 0}
+        self._prev_gray = None
+        self._tracks = []
+        self._since_keyframe = 0
+
+    def process_batch(self, frames):
+        return [self.process(frame) for frame in frames]
+
+    def process(self, frame):
+        gray = self._to_gray(frame)
+        if self._needs_keyframe():
+            boxes = self.detect_batch([frame])[0]
+            self._start_tracks(gray, boxes)
+            self.stats["keyframes"] += 1
+        else:
+            boxes = self._propagate(gray)
+            self.stats["tracked_frames"] += 1
+        self._prev_gray = gray
+        return boxes
+
+    def _to_gray(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _needs_keyframe(self):
+        if self._prev_gray is None or self._since_keyframe >= self.keyframe_interval:
+            return True
+        return any(track["confidence"] < self.min_confidence for track in self._tracks)
+
+    def _start_tracks(self, gray, boxes):
+        self._since_keyframe = 1
+        self._tracks = []
+        for box in boxes:
+            self._tracks.append({
+                "box": box,
+                "points": self._box_points(gray, box),
+                "confidence": 1.0,
+            })
+
+    def _box_points(self, gray, box):
+        _, x, y, w, h = box[:5]
+        x1, y1 = max(int(x * self.scale), 0), max(int(y * self.scale), 0)
+        x2, y2 = int((x + w) * self.scale), int((y + h) * self.scale)
+        mask = np.zeros_like(gray)
+        mask[y1:y2, x1:x2] = 255
+
+        points = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+        if points is None or len(points) < 3:
+            # Flat regions have no corners; a coarse grid still follows global motion
+            xs, ys = np.meshgrid(np.linspace(x1, x2, 4), np.linspace(y1, y2, 4))
+            points = np.stack([xs.ravel(), ys.ravel()], axis=1).reshape(-1, 1, 2)
+        return points.astype(np.float32)
+
+    def _propagate(self, gray):
+        self._since_keyframe += 1
+        if not self._tracks:
+            return []
+
+        counts = [len(track["points"]) for track in self._tracks]
+        points = np.concatenate([track["points"] for track in self._tracks])
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None)
+        fb_error = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < 1.0)
+
+        boxes = []
+        start = 0
+        for track, count in zip(self._tracks, counts):
+            end = start + count
+            track_good = good[start:end]
+            track["confidence"] = float(track_good.mean()) if count else 0.0
+            if track_good.sum() >= 3:
+                shift = np.median((moved[start:end] - points[start:end]).reshape(-1, 2)[track_good], axis=0)
+                dx, dy = int(round(shift[0] / self.scale)), int(round(shift[1] / self.scale))
+                cls_id, x, y, w, h, *rest = track["box"]
+                track["box"] = (cls_id, x + dx, y + dy, w, h, *rest)
+                track["points"] = moved[start:end][track_good]
+            else:
+                track["confidence"] = 0.0
+            boxes.append(track["box"])
+            start = end
+        return boxes
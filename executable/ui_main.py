@@ -1,67 +1,124 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QPushButton, QLabel, QFileDialog, QVBoxLayout, QHBoxLayout,
-    QWidget, QSlider, QProgressBar, QInputDialog, QMessageBox
+    QWidget, QSlider, QProgressBar, QInputDialog, QMessageBox, QCheckBox, QStyle
 )
 from PyQt5.QtCore import QTimer, Qt, QRect, QPoint, pyqtSignal, QObject, QThread
-from PyQt5.QtGui import QPixmap, QImage, QMouseEvent
+from PyQt5.QtGui import QPixmap, QImage, QMouseEvent, QPainter, QColor
 import cv2
 import detector
+from pipeline import VideoPipeline, export_annotated_video
+from tracker import KeyframeTracker, DEFAULT_KEYFRAME_INTERVAL
+from frame_gate import ChangeGate, GatedDetector, DEFAULT_CHANGE_THRESHOLD
+import results_store
+from live import LiveDetector, LiveStats, VideoFileSource
+from playback import PlaybackBuffer
+from seek_index import SeekIndex
+from card_cache import CardArtCache
+from run_catalog import RunCatalog, STATUS_DONE
+import appearance_index
+import time
 import random
 import os
 
+# Card art for the classes detected in the next CARD_PREFETCH_FRAMES frames is
+# loaded in the background, refreshed every CARD_PREFETCH_STEP frames
+CARD_PREFETCH_FRAMES = 90
+CARD_PREFETCH_STEP = 15
+
 class VideoProcessor(QObject):
-    frame_ready = pyqtSignal(QImage)
     finished = pyqtSignal()
-    update_slider = pyqtSignal(int)
     update_progress = pyqtSignal(int)
 
-    def __init__(self, video_path, output_path, result_path, fps):
+    def __init__(self, video_path, output_path, result_path, fps, batch_size=detector.DEFAULT_BATCH_SIZE,
+                 keyframe_interval=None, change_threshold=None, catalog=None, run_id=None):
         super().__init__()
+        self.catalog = catalog
+        self.run_id = run_id
         self.video_path = video_path
         self.output_path = output_path
         self.result_path = result_path
         self.fps = fps
+        self.batch_size = batch_size
+        self.keyframe_interval = keyframe_interval
+        self.change_threshold = change_threshold
 
     def run(self):
-        cap = cv2.VideoCapture(self.video_path)
-        if not cap.isOpened():
-            self.finished.emit()
-            return
-
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(self.output_path, fourcc, self.fps, (width, height))
-
-        with open(self.result_path, 'w') as f:
-            frame_index = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+        frame_detector = None
+        if self.keyframe_interval:
+            frame_detector = KeyframeTracker(keyframe_interval=self.keyframe_interval)
+        if self.change_threshold is not None:
+            frame_detector = GatedDetector(frame_detector, ChangeGate(threshold=self.change_threshold))
+
+        pipeline = VideoPipeline(
+            self.video_path, self.output_path, self.result_path, self.fps,
+            batch_size=self.batch_size, progress_callback=self.update_progress.emit,
+            frame_detector=frame_detector
+        )
+        try:
+            if not pipeline.run():
+                raise IOError(f"Failed to open video: {self.video_path}")
+            print(f"Processing stats: {pipeline.stats}")
+            if self.catalog is not None:
+                self.catalog.finish_run(self.run_id, pipeline.stats)
+        except Exception as e:
+            print(f"Processing error: {e}")
+            if self.catalog is not None:
+                self.catalog.fail_run(self.run_id, e)
+        self.finished.emit()
 
-                frame_with_boxes, boxes = detector.detect_on_frame(frame, return_boxes=True)
-                out.write(frame_with_boxes)
+class AnnotatedExporter(QObject):
+    update_progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
 
-                # Save detection results
-                box_lines = [f"{int(name)}, {x},{y},{w},{h}" for (name, x, y, w, h) in boxes]
+    def __init__(self, video_path, detection_results, output_path, fps, catalog=None, run_id=None):
+        super().__init__()
+        self.video_path = video_path
+        self.detection_results = detection_results
+        self.output_path = output_path
+        self.fps = fps
+        self.catalog = catalog
+        self.run_id = run_id
 
-                f.write(f"Frame {frame_index}: {len(boxes)} detections\n")
-                for line in box_lines:
-                    f.write(f"{line}\n")
+    def run(self):
+        try:
+            ok = export_annotated_video(self.video_path, self.detection_results, self.output_path,
+                                        fps=self.fps, progress_callback=self.update_progress.emit)
+            if ok and self.catalog is not None:
+                self.catalog.set_output_video(self.run_id, self.output_path)
+            message = f"Exported {self.output_path}" if ok else f"Failed to open {self.video_path}"
+        except Exception as e:
+            message = f"Export error: {e}"
+        self.finished.emit(message)
+
+class LiveWorker(QObject):
+    result_ready = pyqtSignal(object, object, float)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, source):
+        super().__init__()
+        self.live = LiveDetector(source, on_result=self.result_ready.emit)
 
-                self.update_progress.emit(int((frame_index / frame_count) * 100))
-                frame_index += 1
+    def run(self):
+        summary = self.live.run()
+        self.finished.emit(summary)
 
-        cap.release()
-        out.release()
-        self.finished.emit()
+    def stop(self):
+        self.live.stop()
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    model_ready = pyqtSignal(str)
+
+    def __init__(self, live_source=None):
         super().__init__()
+        # Video file replayed in place of the screen in live mode (for testing without a screen)
+        self.live_source = live_source
+        self.live_thread = None
+        self.live_worker = None
+        self.live_capture = None
+        self.card_cache = CardArtCache()
+        self.catalog = RunCatalog()
+        self.processing_run_id = None
+
         self.setWindowTitle("Pokémon TCG Card Detector")
         self.resize(1280, 800)
 
@@ -89,26 +146,65 @@ class MainWindow(QMainWindow):
         self.detect_image_button = QPushButton("Detect on Image")
         self.detect_image_button.clicked.connect(self.detect_on_image)
 
+        self.live_button = QPushButton("Live Detection")
+        self.live_button.clicked.connect(self.toggle_live)
+
         self.play_processed_button = QPushButton("Play Processed Video")
         self.play_processed_button.clicked.connect(self.select_processed_video)
 
+        self.export_button = QPushButton("Export Annotated Video")
+        self.export_button.clicked.connect(self.export_annotated)
+
+        self.previous_appearance_button = QPushButton("◀ Card")
+        self.previous_appearance_button.setToolTip("Previous appearance of the selected card")
+        self.previous_appearance_button.clicked.connect(lambda: self.jump_to_appearance(-1))
+
+        self.next_appearance_button = QPushButton("Card ▶")
+        self.next_appearance_button.setToolTip("Next appearance of the selected card")
+        self.next_appearance_button.clicked.connect(lambda: self.jump_to_appearance(1))
+
         self.play_pause_button = QPushButton("Pause")
         self.play_pause_button.clicked.connect(self.toggle_play)
 
+        self.keyframe_checkbox = QCheckBox("Track between keyframes")
+        self.keyframe_checkbox.setToolTip(
+            f"Run the detector every {DEFAULT_KEYFRAME_INTERVAL} frames (or when tracking is lost) "
+            "and follow cards with optical flow in between"
+        )
+
+        self.render_on_playback_checkbox = QCheckBox("Draw boxes on playback")
+        self.render_on_playback_checkbox.setChecked(True)
+        self.render_on_playback_checkbox.setToolTip(
+            "Save only the detections and draw them over the source video when playing, "
+            "instead of encoding an annotated copy (it can be exported later)"
+        )
+
+        self.skip_unchanged_checkbox = QCheckBox("Skip unchanged frames")
+        self.skip_unchanged_checkbox.setToolTip(
+            "Reuse the previous detections when the frame barely differs from the last inferred one"
+        )
+
         self.help_button = QPushButton("Help")
         self.help_button.clicked.connect(self.show_help_popup)
 
-        self.slider = QSlider(Qt.Horizontal)
+        self.slider = PresenceSlider(Qt.Horizontal)
         self.slider.setEnabled(False)
         self.slider.sliderReleased.connect(self.seek_video)
+        self.slider.sliderMoved.connect(self.preview_seek)
 
         self.progress = QProgressBar()
         self.progress.setValue(0)
 
+        self.live_stats_label = QLabel()
+
         # Ui base visibility
         self.slider.setVisible(False)
         self.play_pause_button.setVisible(False)
+        self.export_button.setVisible(False)
+        self.previous_appearance_button.setVisible(False)
+        self.next_appearance_button.setVisible(False)
         self.progress.setVisible(False)
+        self.live_stats_label.setVisible(False)
 
 
         # Layout
@@ -118,10 +214,17 @@ class MainWindow(QMainWindow):
         display_layout = QHBoxLayout()
 
         control_layout.addWidget(self.load_button)
+        control_layout.addWidget(self.keyframe_checkbox)
+        control_layout.addWidget(self.skip_unchanged_checkbox)
+        control_layout.addWidget(self.render_on_playback_checkbox)
         control_layout.addWidget(self.detect_image_button)
+        control_layout.addWidget(self.live_button)
         control_layout.addWidget(self.play_pause_button)
         control_layout.addWidget(self.play_processed_button)
+        control_layout.addWidget(self.export_button)
+        control_layout.addWidget(self.previous_appearance_button)
         control_layout.addWidget(self.slider)
+        control_layout.addWidget(self.next_appearance_button)
         control_layout.addWidget(self.help_button)
         
         display_layout.addWidget(self.video_label, 4)
@@ -135,6 +238,7 @@ class MainWindow(QMainWindow):
 
         layout.addLayout(control_layout)
         layout.addWidget(self.progress)
+        layout.addWidget(self.live_stats_label)
         layout.addLayout(display_layout)
 
         container = QWidget()
@@ -142,11 +246,34 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(container)
 
         self.timer = QTimer()
-        self.timer.timeout.connect(self.next_frame)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.present_frame)
+
+        # Detection calls block until the model is ready; report progress meanwhile
+        self.statusBar().showMessage("Loading detection model...")
+        self.model_ready.connect(self.statusBar().showMessage)
+        detector.load_model_async().add_done_callback(self.on_model_loaded)
+
+    def on_model_loaded(self, future):
+        # Runs on the loader thread; the signal hands the message to the GUI thread
+        error = future.exception()
+        if error is not None:
+            self.model_ready.emit(f"Failed to load detection model: {error}")
+        else:
+            self.model_ready.emit("Detection model ready")
 
     def __init_video__(self):
-        
-        self.cap = None
+        if getattr(self, "playback", None) is not None:
+            self.stop_playback()
+        self.playback = None
+        self.seek_index = None
+        self.playing_run_id = None
+        self.appearances = None
+        self.selected_card = None
+        if getattr(self, "slider", None) is not None:
+            self.select_card(None)
+        self.video_size = None
+        self.card_prefetch_pos = None
         self.detection_results = []
         self.frame_count = 0
         self.current_frame_pos = 0
@@ -154,12 +281,21 @@ class MainWindow(QMainWindow):
         # Ensure results directory exists
         os.makedirs("results", exist_ok=True)
 
-    def next_available_index(self):
-        existing = [f for f in os.listdir("results") if f.startswith("output_") and f.endswith(".mp4")]
-        indices = [int(f.split('_')[1].split('.')[0]) for f in existing if f.split('_')[1].split('.')[0].isdigit()]
-        return max(indices + [0]) + 1
+    def playback_source_for(self, run):
+        """
+        Returns (video_path, seek_index_base, annotate) for a catalog run: its
+        annotated video if it has one, otherwise the source video with boxes
+        drawn on playback.
+        """
+        output_video = run["output_video"]
+        if output_video and os.path.exists(output_video):
+            return output_video, None, False
+        if run["source_video"] is None:
+            return output_video, None, False
+        return run["source_video"], os.path.splitext(run["results_path"])[0], True
 
     def load_video(self):
+        self.stop_live()
         self.progress.setVisible(True)
         self.static_image_mode = False
         video_path, _ = QFileDialog.getOpenFileName(self, "Select video", "", "Videos (*.mp4 *.avi *.mov)")
@@ -180,16 +316,24 @@ class MainWindow(QMainWindow):
         self.slider.setEnabled(True)
         self.current_frame_pos = 0
 
-        index = self.next_available_index()
-        output_path = os.path.join("results", f"output_{index}.mp4")
-        result_path = os.path.join("results", f"results_{index}.txt")
-
         self.processor_thread = QThread()
         self.static_image_mode = False
-        self.processor = VideoProcessor(video_path, output_path, result_path, self.fps)
+        keyframe_interval = DEFAULT_KEYFRAME_INTERVAL if self.keyframe_checkbox.isChecked() else None
+        change_threshold = DEFAULT_CHANGE_THRESHOLD if self.skip_unchanged_checkbox.isChecked() else None
+        render_on_playback = self.render_on_playback_checkbox.isChecked()
+
+        settings = dict(detector.current_settings(), batch_size=detector.DEFAULT_BATCH_SIZE,
+                        keyframe_interval=keyframe_interval, change_threshold=change_threshold,
+                        render_on_playback=render_on_playback)
+        run = self.catalog.create_run(video_path, settings, annotated=not render_on_playback)
+        self.processing_run_id = run["id"]
+
+        self.processor = VideoProcessor(video_path, run["output_video"], run["results_path"], self.fps,
+                                        keyframe_interval=keyframe_interval,
+                                        change_threshold=change_threshold,
+                                        catalog=self.catalog, run_id=run["id"])
         self.processor.moveToThread(self.processor_thread)
 
-        self.processor.update_slider.connect(self.slider.setValue)
         self.processor.update_progress.connect(self.progress.setValue)
         self.processor.finished.connect(self.processor_thread.quit)
         self.processor.finished.connect(self.on_processing_finished)
@@ -198,116 +342,202 @@ class MainWindow(QMainWindow):
         self.processor_thread.start()
 
     def select_processed_video(self):
+        self.stop_live()
         self.__init_video__()
         self.static_image_mode = False
         self.detail_label.setText("Click on a card to see detail")
         self.detail_label.setPixmap(QPixmap())
         
-        files = sorted([
-            f for f in os.listdir("results")
-            if f.startswith("output_") and f.endswith(".mp4")
-        ])
+        runs = self.catalog.playable_runs()
 
-        if not files:
+        if not runs:
             self.video_label.setText("No processed videos found in 'results' folder.")
             return
 
-        items = [f.replace("output_", "").replace(".mp4", "") for f in files]
+        items = [
+            f"{run['id']}: {os.path.basename(run['source_video'])}" if run["source_video"] else str(run["id"])
+            for run in runs
+        ]
         item, ok = QInputDialog.getItem(self, "Choose Processed Video", "Video:", items, 0, False)
         if not ok or not item:
             return
 
-        output_video = os.path.join("results", f"output_{item}.mp4")
-        result_file = os.path.join("results", f"results_{item}.txt")
-
-        self.cap = detector.load_detection_video(output_video)
-        self.detection_results = detector.load_detection_results(result_file)
-
-        if not self.cap or not self.cap.isOpened():
-            self.video_label.setText("Failed to load processed video.")
-            return
-
-        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
-
-        self.slider.setMaximum(self.frame_count - 1)
-        self.slider.setEnabled(True)
-        self.current_frame_pos = 0
-        self.slider.setVisible(True)
-        self.play_pause_button.setVisible(True)
-        self.timer.start(1000 // self.fps)
-        self.play_pause_button.setText("Pause")
+        self.play_run(runs[items.index(item)])
 
     def on_processing_finished(self):
         self.progress.setValue(100)
         self.static_image_mode = False
-        # Find the latest processed file
-        index = self.next_available_index() - 1  # Because we incremented before
-        output_video = os.path.join("results", f"output_{index}.mp4")
-        result_file = os.path.join("results", f"results_{index}.txt")
-
-        self.cap = detector.load_detection_video(output_video)
-        self.detection_results = detector.load_detection_results(result_file)
-
-        if not self.cap or not self.cap.isOpened():
+        run = self.catalog.get_run(self.processing_run_id)
+        if run["status"] == STATUS_DONE:
+            self.play_run(run)
+        else:
+            self.video_label.setText(f"Processing failed: {run['error']}")
+        # remove progress bar
+        self.progress.setValue(0)
+        self.progress.setVisible(False)
+        self.live_stats_label.setVisible(False)
+
+    def play_run(self, run):
+        video_path, seek_index_base, annotate = self.playback_source_for(run)
+        self.start_playback(video_path, run["results_path"], seek_index_base, annotate)
+        self.playing_run_id = run["id"]
+        # Runs without an annotated video can have one encoded on demand
+        self.export_button.setVisible(annotate)
+
+    def start_playback(self, output_video, result_file, seek_index_base=None, annotate=False):
+        self.stop_playback()
+        cap = detector.load_detection_video(output_video)
+        if not cap or not cap.isOpened():
             self.video_label.setText("Failed to load processed video.")
             return
 
-        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+        self.video_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+
+        self.detection_results = results_store.load_results(result_file)
+        self.appearances = appearance_index.load_index(self.detection_results)
+        self.select_card(None)
+        self.seek_index = SeekIndex.load(output_video, seek_index_base)
+        self.playback = PlaybackBuffer(output_video, self.detection_results, seek_index=self.seek_index,
+                                       annotate=annotate)
+        self.playback.start()
+
         self.slider.setMaximum(self.frame_count - 1)
         self.slider.setEnabled(True)
         self.current_frame_pos = 0
-
-        # Show controls and start video
         self.slider.setVisible(True)
         self.play_pause_button.setVisible(True)
-        self.timer.start(1000 // self.fps)
-        self.play_pause_button.setText("Pause")
-        # remove progress bar
+        self.play_from(0)
+
+    def export_annotated(self):
+        if self.playing_run_id is None or self.playback is None:
+            return
+        output_path = os.path.join(self.catalog.results_dir, f"output_{self.playing_run_id}.mp4")
+        self.export_button.setEnabled(False)
         self.progress.setValue(0)
+        self.progress.setVisible(True)
+
+        self.export_thread = QThread()
+        self.exporter = AnnotatedExporter(self.playback.video_path, self.detection_results, output_path, self.fps,
+                                          catalog=self.catalog, run_id=self.playing_run_id)
+        self.exporter.moveToThread(self.export_thread)
+        self.exporter.update_progress.connect(self.progress.setValue)
+        self.exporter.finished.connect(self.export_thread.quit)
+        self.exporter.finished.connect(self.on_export_finished)
+        self.export_thread.started.connect(self.exporter.run)
+        self.export_thread.start()
+
+    def on_export_finished(self, message):
+        self.statusBar().showMessage(message)
         self.progress.setVisible(False)
+        self.export_button.setEnabled(True)
+        self.export_button.setVisible(False)
+
+    def stop_playback(self):
+        self.timer.stop()
+        if self.playback is not None:
+            self.playback.stop()
+            print(f"Playback: {self.playback.dropped} dropped, {self.playback.late} late frames")
+            self.playback = None
+
+    def play_from(self, frame_index):
+        # Frames are presented against a monotonic clock started here
+        self.clock_start = time.perf_counter()
+        self.clock_start_frame = frame_index
+        # Poll several times per frame so each one is shown close to its due time
+        self.timer.start(max(1000 // (self.fps * 4), 1))
+        self.play_pause_button.setText("Pause")
 
-    def next_frame(self):
-        if self.cap is None:
+    def present_frame(self):
+        if self.playback is None:
             return
 
-        ret, frame = self.cap.read()
-        if not ret:
-            self.timer.stop()
-            self.video_label.setText("Video ended.")
+        due = self.clock_start_frame + int((time.perf_counter() - self.clock_start) * self.fps)
+        item = self.playback.take(due)
+        if item is None:
+            if self.playback.finished():
+                self.timer.stop()
+                self.video_label.setText("Video ended.")
             return
 
-        boxes = self.detection_results.get(self.current_frame_pos, [])
-        for (_, x, y, w, h) in boxes:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
-
+        frame_index, q_img = item
+        self.current_frame_pos = frame_index
         self.slider.blockSignals(True)
-        self.slider.setValue(self.current_frame_pos)
+        self.slider.setValue(frame_index)
         self.slider.blockSignals(False)
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb.shape
-        q_img = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
         self.video_label.setPixmap(QPixmap.fromImage(q_img))
+        self.prefetch_cards(frame_index)
+
+    def prefetch_cards(self, frame_index):
+        # Warm the card art for the cards on screen now and in the next few seconds
+        if self.card_prefetch_pos is not None and 0 <= frame_index - self.card_prefetch_pos < CARD_PREFETCH_STEP:
+            return
+        self.card_prefetch_pos = frame_index
+        classes = self.detection_results.classes_between(frame_index, frame_index + CARD_PREFETCH_FRAMES)
+        self.card_cache.prefetch(classes, self.card_art_size())
 
-        self.current_frame_pos += 1
+    def card_art_size(self):
+        return (self.detail_label.width(), self.detail_label.height())
 
     def toggle_play(self):
         if self.timer.isActive():
             self.timer.stop()
             self.play_pause_button.setText("Play")
         else:
-            self.timer.start(1000 // self.fps)
-            self.play_pause_button.setText("Pause")
+            self.play_from(self.current_frame_pos + 1)
+
+    def preview_seek(self, pos):
+        # While dragging, show the cached thumbnail instead of decoding
+        thumbnail = self.seek_index.thumbnail(pos) if self.seek_index is not None else None
+        if thumbnail is None:
+            return
+        rgb = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        q_img = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
+        self.video_label.setPixmap(QPixmap.fromImage(q_img))
 
     def seek_video(self):
         pos = self.slider.value()
-        if self.cap:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+        if self.playback:
+            self.playback.seek(pos)
             self.current_frame_pos = pos
-   
+            if self.timer.isActive():
+                self.play_from(pos)
+            else:
+                self.clock_start_frame = pos
+
+    def select_card(self, cls_id):
+        # Shows where the card appears on the slider and enables jumping between appearances
+        self.selected_card = cls_id
+        has_card = cls_id is not None and self.appearances is not None
+        self.previous_appearance_button.setVisible(has_card)
+        self.next_appearance_button.setVisible(has_card)
+        if has_card:
+            starts, stops = self.appearances.ranges(cls_id)
+            self.slider.set_presence(starts, stops, self.appearances.frame_count)
+        else:
+            self.slider.set_presence(None, None, 0)
+
+    def jump_to_appearance(self, direction):
+        if self.selected_card is None or self.appearances is None:
+            return
+        if direction > 0:
+            frame = self.appearances.next_appearance(self.selected_card, self.current_frame_pos)
+        else:
+            frame = self.appearances.previous_appearance(self.selected_card, self.current_frame_pos)
+        if frame is None:
+            self.statusBar().showMessage("No other appearance of this card", 2000)
+            return
+        self.slider.setValue(frame)
+        self.seek_video()
+        if not self.timer.isActive():
+            # Paused: nothing is presented until playback resumes, so show the preview
+            self.preview_seek(frame)
+
     def detect_on_image(self):
+        self.stop_live()
         self.static_image_mode = True
         self.__init_video__()
         self.detail_label.setText("Click on a card to see detail")
@@ -325,7 +555,8 @@ class MainWindow(QMainWindow):
 
         # Store detections for click interaction
         self.static_image_mode = True
-        self.static_detections = [(int(name), x, y, w, h) for (name, x, y, w, h) in boxes]
+        self.static_detections = [(int(name), x, y, w, h) for (name, x, y, w, h, *_) in boxes]
+        self.card_cache.prefetch([d[0] for d in self.static_detections], self.card_art_size())
 
         # Convert to QImage and show
         rgb = cv2.cvtColor(frame_with_boxes, cv2.COLOR_BGR2RGB)
@@ -333,6 +564,98 @@ class MainWindow(QMainWindow):
         q_img = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
         self.video_label.setPixmap(QPixmap.fromImage(q_img))
 
+    def toggle_live(self):
+        if self.live_thread is not None:
+            self.stop_live()
+        else:
+            self.start_live()
+
+    def start_live(self):
+        self.timer.stop()
+        self.__init_video__()
+        self.slider.setVisible(False)
+        self.play_pause_button.setVisible(False)
+        self.detail_label.setText("Click on a card to see detail")
+        self.detail_label.setPixmap(QPixmap())
+
+        if self.live_source:
+            source = VideoFileSource(self.live_source)
+        else:
+            # Imported here: mss/pygetwindow are only needed for live capture
+            import screen_capture
+            from select_region import select_screen_region
+            region = select_screen_region()
+            if region["width"] <= 0 or region["height"] <= 0:
+                return
+            screen_capture.set_capture_region(region)
+            source = screen_capture.CaptureSession(region)
+
+        self.live_capture = source
+        self.live_display_stats = LiveStats()
+        source.start()
+
+        self.live_thread = QThread()
+        self.live_worker = LiveWorker(source)
+        self.live_worker.moveToThread(self.live_thread)
+        self.live_worker.result_ready.connect(self.on_live_result)
+        self.live_worker.finished.connect(self.live_thread.quit)
+        self.live_worker.finished.connect(self.on_live_stopped)
+        self.live_thread.started.connect(self.live_worker.run)
+        self.live_thread.start()
+
+        self.live_button.setText("Stop Live")
+        self.live_stats_label.setText("Waiting for the first frame...")
+        self.live_stats_label.setVisible(True)
+
+    def stop_live(self):
+        if self.live_thread is None:
+            return
+        # Finish synchronously; a queued finished signal must not tear down a later session
+        self.live_worker.finished.disconnect(self.on_live_stopped)
+        self.live_worker.stop()
+        self.live_thread.quit()
+        self.live_thread.wait()
+        self.on_live_stopped()
+
+    def on_live_stopped(self, summary=None):
+        if self.live_capture is not None:
+            self.live_capture.stop()
+            self.live_capture = None
+        self.live_thread = None
+        self.live_worker = None
+        self.live_button.setText("Live Detection")
+
+    def on_live_result(self, frame, boxes, capture_timestamp):
+        if self.live_thread is None:
+            return
+        detector.draw_detections(frame, boxes)
+
+        # Clicks on the live frame use the same path as a static image
+        self.static_image_mode = True
+        self.static_detections = [(int(name), x, y, w, h) for (name, x, y, w, h, *_) in boxes]
+        self.card_cache.prefetch([d[0] for d in self.static_detections], self.card_art_size())
+
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        q_img = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
+        self.video_label.setPixmap(QPixmap.fromImage(q_img))
+
+        # Glass-to-glass: from the capture timestamp to the frame being on screen
+        self.live_display_stats.add(capture_timestamp, time.perf_counter())
+        stats = self.live_display_stats.summary()
+        counts = self.live_worker.live.frame_counts()
+        self.live_stats_label.setText(
+            f"{stats['fps']:.1f} FPS | latency {stats['latency_ms']:.0f} ms "
+            f"(p95 {stats['latency_p95_ms']:.0f} ms) | dropped frames {self.live_capture.dropped} | "
+            f"inferred {counts['inferred_frames']}, unchanged {counts['skipped_frames']}"
+        )
+
+    def closeEvent(self, event):
+        self.stop_live()
+        self.stop_playback()
+        self.card_cache.shutdown()
+        super().closeEvent(event)
+
     def on_frame_clicked(self, point):
         if self.static_image_mode:
             # Click on static image with detections
@@ -354,9 +677,8 @@ class MainWindow(QMainWindow):
                     self.load_card_by_index(idx)
                     return
 
-        elif hasattr(self, 'detection_results') and self.cap:
-            video_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            video_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        elif self.playback is not None:
+            video_width, video_height = self.video_size
 
             label_width = self.video_label.width()
             label_height = self.video_label.height()
@@ -366,27 +688,14 @@ class MainWindow(QMainWindow):
 
             scaled_point = QPoint(int(point.x() * scale_x), int(point.y() * scale_y))
 
-            boxes = self.detection_results.get(self.current_frame_pos, [])
-            for (name, x, y, w, h) in boxes:
-                rect = QRect(x, y, w, h)
-                if rect.contains(scaled_point):
-                    try:
-                        idx = int(name)
-                        self.load_card_by_index(idx)
-                    except ValueError:
-                        print(f"Invalid index: {name}")
-                    return
+            idx = self.detection_results.hit_test(self.current_frame_pos, scaled_point.x(), scaled_point.y())
+            if idx is not None:
+                self.load_card_by_index(idx)
+                self.select_card(idx)
 
     def load_card_by_index(self, idx):
-        card_path = f"./cards/sv1-{idx+1}/sv1-{idx+1}.png"
-        if os.path.exists(card_path):
-            pixmap = QPixmap(card_path)
-            scaled = pixmap.scaled(
-                self.detail_label.width(),
-                self.detail_label.height(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
+        scaled = self.card_cache.get(idx, self.card_art_size())
+        if scaled is not None:
             self.detail_label.setPixmap(scaled)
         else:
             self.detail_label.setText(f"Card image not found for index {idx}")
@@ -402,9 +711,46 @@ class MainWindow(QMainWindow):
             "Click 'Detect on Image' and choose an image file.\n\n"
             "To view previous results:\n"
             "Click 'Play Processed Video'.\n\n"
+            "To detect cards live:\n"
+            "Click 'Live Detection' and drag over the part of the screen to watch.\n\n"
             "Click on a card in the video/image to preview it on the right."
         )
 
+class PresenceSlider(QSlider):
+    """
+    Slider that marks the frame ranges of the selected card in a strip along
+    its bottom edge.
+    """
+
+    PRESENCE_COLOR = QColor(0, 200, 0)
+    PRESENCE_HEIGHT = 4
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._starts = None
+        self._stops = None
+        self._frame_count = 0
+
+    def set_presence(self, starts, stops, frame_count):
+        self._starts, self._stops, self._frame_count = starts, stops, frame_count
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._starts is None or len(self._starts) == 0 or self._frame_count <= 0:
+            return
+        # The handle centre spans the width minus one handle length
+        margin = self.style().pixelMetric(QStyle.PM_SliderLength, None, self) // 2
+        span = max(self.width() - 2 * margin, 1)
+        scale = span / self._frame_count
+        top = self.height() - self.PRESENCE_HEIGHT
+        painter = QPainter(self)
+        for start, stop in zip(self._starts, self._stops):
+            x = margin + int(start * scale)
+            painter.fillRect(x, top, max(int((stop - start) * scale), 1), self.PRESENCE_HEIGHT,
+                             self.PRESENCE_COLOR)
+        painter.end()
+
 class ClickableLabel(QLabel):
     clicked = pyqtSignal(QPoint)
 
@@ -0,0 +1,56 @@
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "executable"))
+
+from run_catalog import RunCatalog, STATUS_DONE, STATUS_ORPHANED, CATALOG_NAME
+
+def touch(path):
+    with open(path, "w") as f:
+        f.write("0 0.5 0.5 0.1 0.1\n")
+
+def test_results_only_runs_are_orphaned(tmp_path):
+    for index in (1, 2, 3):
+        touch(tmp_path / f"results_{index}.txt")
+
+    catalog = RunCatalog(str(tmp_path))
+
+    runs = catalog.list_runs(status=None)
+    assert [run["id"] for run in runs] == [1, 2, 3]
+    assert all(run["status"] == STATUS_ORPHANED for run in runs)
+    assert catalog.list_runs() == []
+    assert catalog.playable_runs() == []
+
+def test_runs_with_a_video_stay_playable(tmp_path):
+    touch(tmp_path / "results_1.txt")
+    touch(tmp_path / "results_2.txt")
+    touch(tmp_path / "output_2.mp4")
+
+    catalog = RunCatalog(str(tmp_path))
+
+    assert catalog.get_run(1)["status"] == STATUS_ORPHANED
+    assert catalog.get_run(2)["status"] == STATUS_DONE
+    assert [run["id"] for run in catalog.playable_runs()] == [2]
+
+def test_new_runs_are_playable_while_their_source_exists(tmp_path):
+    video = tmp_path / "match.mp4"
+    touch(video)
+    catalog = RunCatalog(str(tmp_path))
+    run = catalog.create_run(str(video), annotated=False)
+    catalog.finish_run(run["id"], {"frames": 10, "elapsed": 1.0})
+    assert [r["id"] for r in catalog.playable_runs()] == [run["id"]]
+
+    os.remove(video)
+    assert catalog.playable_runs() == []
+
+def test_version_1_catalogs_are_migrated(tmp_path):
+    touch(tmp_path / "results_1.txt")
+    RunCatalog(str(tmp_path))
+    db = sqlite3.connect(str(tmp_path / CATALOG_NAME))
+    db.execute("UPDATE runs SET status = ?", (STATUS_DONE,))
+    db.execute("PRAGMA user_version = 1")
+    db.commit()
+    db.close()
+
+    assert RunCatalog(str(tmp_path)).get_run(1)["status"] == STATUS_ORPHANED